@@ -0,0 +1,164 @@
+import asyncio
+import threading
+import time
+from typing import Awaitable, Callable, Optional
+
+from redis.exceptions import ClusterDownError, ConnectionError, DataError, RedisError, TimeoutError
+
+# Errors meaning Redis is unreachable or too slow; only these count toward opening the breaker.
+OUTAGE_ERRORS = (ConnectionError, TimeoutError, ClusterDownError, OSError, asyncio.TimeoutError)
+
+
+class RedisUnavailableError(Exception):
+    """
+    Raised when a Redis call fails, times out, or is refused by an open circuit breaker.
+    """
+
+
+class CircuitOpenError(RedisUnavailableError):
+    """
+    Raised without contacting Redis while the circuit breaker is open.
+    """
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker bounding the latency of Redis calls during an incident.
+
+    Every call gets a hard deadline of `call_timeout` seconds. After `failure_threshold`
+    consecutive errors or timeouts the breaker opens and calls fail immediately. Once
+    `recovery_timeout` seconds have passed a single probe call is let through: if it
+    succeeds the breaker closes and `on_close` is invoked; any other outcome, including
+    cancellation, opens it again for another `recovery_timeout`.
+
+    Only connection errors and timeouts count as failures. Other Redis errors, such as a
+    script error, still raise `RedisUnavailableError` so the rule's failure policy applies,
+    but they do not trip the breaker. A `DataError`, raised by the client for arguments it
+    cannot send, is a bug in the caller rather than an outage and is raised unchanged.
+
+    State changes are guarded by a lock, so one breaker can be shared by threads calling
+    `call_sync`. Sync calls have no deadline of their own; bound them with the client's
+    socket timeout.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int,
+        recovery_timeout: float,
+        call_timeout: Optional[float],
+        on_close: Optional[Callable[[], None]] = None,
+    ):
+        """
+        :param failure_threshold: Consecutive failures that trip the breaker.
+        :param recovery_timeout: Seconds to stay open before probing.
+        :param call_timeout: Deadline in seconds for each call; None disables it.
+        :param on_close: Called when a successful probe closes the breaker.
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.call_timeout = call_timeout
+        self.on_close = on_close
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def is_closed(self) -> bool:
+        return self.state == self.CLOSED
+
+    def _allow(self) -> bool:
+        """Decide whether a call may go to Redis, moving to half-open when it is time to probe."""
+        if self.state == self.CLOSED:
+            return True
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.recovery_timeout:
+                self.state = self.HALF_OPEN
+                return True
+        return False
+
+    def _record_success(self):
+        if self.state == self.CLOSED and not self.failures:
+            return
+        with self._lock:
+            recovered = self.state != self.CLOSED
+            self.state = self.CLOSED
+            self.failures = 0
+        if recovered and self.on_close is not None:
+            self.on_close()
+
+    def _record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def _abort_probe(self):
+        """Reopen the breaker if the call that ended without success was the half-open probe."""
+        if self.state != self.HALF_OPEN:
+            return
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    async def call(self, awaitable: Awaitable):
+        """
+        Await `awaitable` under the breaker.
+
+        :raises CircuitOpenError: If the breaker is open; `awaitable` is not awaited.
+        :raises RedisUnavailableError: If the call fails or exceeds the deadline.
+        """
+        if not self._allow():
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            raise CircuitOpenError("Redis circuit breaker is open.")
+        try:
+            if self.call_timeout is None:
+                result = await awaitable
+            else:
+                result = await asyncio.wait_for(awaitable, self.call_timeout)
+        except OUTAGE_ERRORS as error:
+            self._record_failure()
+            raise RedisUnavailableError(str(error) or type(error).__name__) from error
+        except DataError:
+            self._abort_probe()
+            raise
+        except RedisError as error:
+            self._abort_probe()
+            raise RedisUnavailableError(str(error) or type(error).__name__) from error
+        except BaseException:
+            self._abort_probe()
+            raise
+        self._record_success()
+        return result
+
+    def call_sync(self, function: Callable, *args, **kwargs):
+        """
+        Call `function(*args, **kwargs)` under the breaker.
+
+        :raises CircuitOpenError: If the breaker is open; `function` is not called.
+        :raises RedisUnavailableError: If the call fails or times out.
+        """
+        if not self._allow():
+            raise CircuitOpenError("Redis circuit breaker is open.")
+        try:
+            result = function(*args, **kwargs)
+        except OUTAGE_ERRORS as error:
+            self._record_failure()
+            raise RedisUnavailableError(str(error) or type(error).__name__) from error
+        except DataError:
+            self._abort_probe()
+            raise
+        except RedisError as error:
+            self._abort_probe()
+            raise RedisUnavailableError(str(error) or type(error).__name__) from error
+        except BaseException:
+            self._abort_probe()
+            raise
+        self._record_success()
+        return result
@@ -2,6 +2,21 @@ import os
 
 class Config:
     REDIS_URL = os.getenv("REDIS_FEX_NEJI_READ_WRITE")
+    DEFAULT_TIMEZONE = os.getenv("ALFRED_TIMEZONE", "UTC")
+    REDIS_CLUSTER = os.getenv("ALFRED_REDIS_CLUSTER", "false").lower() in ("1", "true", "yes")
+    REDIS_MAX_CONNECTIONS = int(os.getenv("ALFRED_REDIS_MAX_CONNECTIONS", "50"))
+    REDIS_HEALTH_CHECK_INTERVAL = int(os.getenv("ALFRED_REDIS_HEALTH_CHECK_INTERVAL", "30"))
+    REDIS_SOCKET_TIMEOUT = float(os.getenv("ALFRED_REDIS_SOCKET_TIMEOUT", "1.0"))
+    REDIS_SOCKET_CONNECT_TIMEOUT = float(os.getenv("ALFRED_REDIS_SOCKET_CONNECT_TIMEOUT", "1.0"))
+    QUOTA_LEASE_TIMEOUT = float(os.getenv("ALFRED_QUOTA_LEASE_TIMEOUT", "5.0"))
+    DENIAL_CACHE_SIZE = int(os.getenv("ALFRED_DENIAL_CACHE_SIZE", "10000"))
+    DENIAL_CACHE_MAX_TTL = float(os.getenv("ALFRED_DENIAL_CACHE_MAX_TTL", "60.0"))
+    DEFERRED_FLUSH_INTERVAL = float(os.getenv("ALFRED_DEFERRED_FLUSH_INTERVAL", "0.05"))
+    DEFERRED_MAX_ENTRIES = int(os.getenv("ALFRED_DEFERRED_MAX_ENTRIES", "1000"))
+    FAILURE_POLICY = os.getenv("ALFRED_FAILURE_POLICY", "fail_open")
+    REDIS_CALL_TIMEOUT = float(os.getenv("ALFRED_REDIS_CALL_TIMEOUT", "0.25"))
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD = int(os.getenv("ALFRED_CIRCUIT_BREAKER_FAILURE_THRESHOLD", "5"))
+    CIRCUIT_BREAKER_RECOVERY_TIMEOUT = float(os.getenv("ALFRED_CIRCUIT_BREAKER_RECOVERY_TIMEOUT", "5.0"))
 
 
-loaded_config = Config()
\ No newline at end of file
+loaded_config = Config()
@@ -2,6 +2,38 @@ from enum import Enum
 
 
 class ResetPeriod(str, Enum):
+    MINUTELY = "minutely"
     HOURLY = "hourly"
     DAILY = "daily"
     MONTHLY = "monthly"
+
+
+class ModelTier(str, Enum):
+    STANDARD = "standard"
+    PREMIUM = "premium"
+
+
+class LimiterAlgorithm(str, Enum):
+    FIXED_WINDOW = "fixed_window"
+    SLIDING_WINDOW = "sliding_window"
+    TOKEN_BUCKET = "token_bucket"
+
+
+# Length in seconds of a rolling window, used by the sliding window and token bucket limiters.
+RESET_PERIOD_SECONDS = {
+    ResetPeriod.MINUTELY: 60,
+    ResetPeriod.HOURLY: 60 * 60,
+    ResetPeriod.DAILY: 24 * 60 * 60,
+    ResetPeriod.MONTHLY: 30 * 24 * 60 * 60,
+}
+
+
+class FailurePolicy(str, Enum):
+    FAIL_OPEN = "fail_open"
+    FAIL_CLOSED = "fail_closed"
+    LOCAL = "local"
+
+
+class LimitUnit(str, Enum):
+    REQUESTS = "requests"
+    COST = "cost"
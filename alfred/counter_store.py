@@ -0,0 +1,235 @@
+from abc import ABC, abstractmethod
+from typing import List, Optional, Sequence, Tuple
+
+from alfred.constants import LimiterAlgorithm, ResetPeriod
+from alfred.denial_cache import DenialCache
+from alfred.instrumentation import MetricsSink
+from alfred.window_calendar import get_window_calendar
+
+COUNTER_DEFAULTS = ("", 1)
+
+
+def normalize_counter(counter: tuple) -> tuple:
+    """
+    Pad a (key, limit, ttl, algorithm[, limit_field[, cost]]) counter with the defaults of
+    its optional fields.
+    """
+    return tuple(counter) + COUNTER_DEFAULTS[len(counter) - 4:]
+
+
+class CounterKeyScheme:
+    """
+    The counter key scheme, shared by every counter store, sync or async.
+    """
+
+    @staticmethod
+    def build_key(user_id: str, org_id: Optional[str], rule_id: str) -> str:
+        """
+        Build the counter key for a rule, scoped to the org when present, else to the user.
+        The tenant part is a hash tag, so every counter of a tenant maps to the same slot.
+        """
+        return f"{{org:{org_id}}}:rule:{rule_id}" if org_id else f"{{user:{user_id}}}:rule:{rule_id}"
+
+    @classmethod
+    def window_key(
+        cls,
+        user_id: str,
+        org_id: Optional[str],
+        rule_id: str,
+        reset_period: ResetPeriod = ResetPeriod.MONTHLY,
+        timezone: Optional[str] = None,
+    ) -> Tuple[str, int]:
+        """
+        Return the key of a rule's fixed window counter for the current window, as charged
+        by validators, and the seconds until the window ends.
+
+        :param reset_period: The rule's reset period.
+        :param timezone: Timezone the rule's windows are computed in; defaults to the
+            configured one.
+        """
+        calendar = get_window_calendar(timezone) if timezone else get_window_calendar()
+        window_id, seconds = calendar.current_window(ResetPeriod(reset_period))
+        return f"{cls.build_key(user_id, org_id, rule_id)}:{window_id}", seconds
+
+    @staticmethod
+    def limits_key(counter_key: str) -> str:
+        """
+        Return the key of the hash of limit overrides for the tenant owning `counter_key`.
+        It shares the counter's hash tag, so both live in the same slot.
+        """
+        return f"{counter_key.partition('}')[0]}}}:limits"
+
+
+class CounterStore(CounterKeyScheme, ABC):
+    """
+    Storage backend for usage counters, shared by every validator of a ValidatorFactory.
+
+    Backends implement atomic check-and-increment for every `LimiterAlgorithm`, plain
+    increments, bulk reads, TTL lookups and resets; the per-tenant key scheme and the
+    per-user helpers are provided here. `RedisManager` stores counters in Redis and
+    `InMemoryCounterStore` keeps them in process.
+
+    Their methods are coroutines; `SyncRedisManager`, whose methods are not, sets
+    `synchronous`.
+    """
+    synchronous = False
+    metrics: Optional[MetricsSink] = None
+    denial_cache: DenialCache
+
+    async def check_and_increment(
+        self,
+        key: str,
+        limit: int,
+        ttl: int,
+        algorithm: LimiterAlgorithm = LimiterAlgorithm.FIXED_WINDOW,
+        limit_field: str = "",
+        cost: int = 1,
+    ) -> list:
+        """
+        Atomically count a request against the counter at `key` unless it would exceed `limit`.
+
+        :param key: Counter key, see `build_key`.
+        :param limit: Maximum allowed count per window.
+        :param ttl: For fixed windows, the expiration in seconds applied when the counter is
+            created; for sliding windows and token buckets, the rolling window length.
+        :param algorithm: Limiter algorithm used for this counter.
+        :param limit_field: Field of the tenant's limit overrides whose value, if set, replaces
+            `limit`; usually the rule id. Backends without overrides ignore it.
+        :param cost: Units the request consumes.
+        :return: [allowed, count, seconds until the window resets or, when denied, until a
+            request may be allowed again].
+        """
+        cached = self.denial_cache.get(key, limit, cost)
+        if cached is not None:
+            return cached
+        return (await self.check_and_increment_many([(key, limit, ttl, algorithm, limit_field, cost)]))[0]
+
+    @abstractmethod
+    async def check_and_increment_many(self, counters: Sequence[tuple]) -> List[list]:
+        """
+        Check and increment several counters atomically: every counter is incremented only
+        if all of them allow the request, otherwise none is and their current state is reported.
+
+        :param counters: (key, limit, ttl, algorithm[, limit_field[, cost]]) for each counter,
+            see `check_and_increment`.
+        :return: [allowed, count, seconds] for each counter, in order.
+        """
+
+    async def check_and_increment_leased(
+        self, key: str, limit: int, ttl: int, block_size: int, limit_field: str = ""
+    ) -> list:
+        """
+        Count a request against a fixed window counter, possibly from a locally leased block
+        of `block_size` units. Backends without leasing charge the counter directly.
+
+        :return: [allowed, count, remaining ttl in seconds].
+        """
+        return await self.check_and_increment(key, limit, ttl, limit_field=limit_field)
+
+    @abstractmethod
+    async def increment(self, key: str, amount: int, ttl: int) -> int:
+        """
+        Add `amount` to a fixed window counter without checking any limit.
+
+        :param key: Counter key.
+        :param amount: Units to add.
+        :param ttl: Expiration in seconds applied when the counter has none.
+        :return: The count after the increment.
+        """
+
+    async def increment_many(self, increments: Sequence[tuple]) -> List[int]:
+        """
+        Add to several fixed window counters at once, see `increment`.
+
+        :param increments: (key, amount, ttl) for each counter.
+        :return: The count of each counter after its increment, in order.
+        """
+        return [await self.increment(key, amount, ttl) for key, amount, ttl in increments]
+
+    async def check_and_increment_deferred(self, key: str, limit: int, ttl: int, cost: int = 1) -> list:
+        """
+        Count a request against a soft-limited fixed window counter, possibly deferring the
+        write. Backends without deferral charge the counter directly.
+
+        :return: [allowed, count, remaining ttl in seconds].
+        """
+        return await self.check_and_increment(key, limit, ttl, cost=cost)
+
+    @abstractmethod
+    async def get_many(self, keys: Sequence[str]) -> List[int]:
+        """
+        Read several fixed window counters at once.
+
+        :return: The count of each key, in order; 0 for missing keys and for keys holding
+            sliding window or token bucket state.
+        """
+
+    @abstractmethod
+    async def ttl(self, key: str) -> int:
+        """
+        Return the remaining lifetime of `key` in seconds, -1 if it never expires and -2 if
+        it does not exist.
+        """
+
+    @abstractmethod
+    async def reset(self, key: str) -> int:
+        """
+        Delete `key` along with every key derived from it (`<key>:*`), such as per-window,
+        per-tier and per-algorithm counters.
+
+        :return: Number of keys deleted.
+        """
+
+    async def aclose(self):
+        """
+        Release the backend's resources. Call once on application shutdown.
+        """
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aclose()
+
+    async def increment_request_count(
+        self,
+        user_id: str,
+        org_id: Optional[str],
+        rule_id: str,
+        expiration: Optional[int] = None,
+        amount: int = 1,
+        reset_period: ResetPeriod = ResetPeriod.MONTHLY,
+        timezone: Optional[str] = None,
+    ) -> list:
+        """
+        Add `amount` to a rule's fixed window counter for the current window, see
+        `window_key`, without checking any limit.
+
+        :param expiration: TTL applied when the counter is created; defaults to the time
+            until the window ends.
+        """
+        key, seconds = self.window_key(user_id, org_id, rule_id, reset_period, timezone)
+        count = await self.increment(key, amount, expiration or seconds)
+        return [True, {"key": key, "count": count}, "SUCCESS"]
+
+    async def get_request_count(
+        self,
+        user_id: str,
+        org_id: Optional[str],
+        rule_id: str,
+        reset_period: ResetPeriod = ResetPeriod.MONTHLY,
+        timezone: Optional[str] = None,
+    ) -> int:
+        """
+        Read a rule's fixed window counter for the current window, see `window_key`.
+        """
+        return (await self.get_many([self.window_key(user_id, org_id, rule_id, reset_period, timezone)[0]]))[0]
+
+    async def reset_request_count(self, user_id: str, org_id: Optional[str], rule_id: str):
+        """
+        Delete the counter for a rule along with every counter derived from its key, such
+        as per-window, per-tier and per-algorithm counters.
+        """
+        key = self.build_key(user_id, org_id, rule_id)
+        await self.reset(key)
+        self.denial_cache.invalidate(key)
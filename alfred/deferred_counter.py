@@ -0,0 +1,128 @@
+import asyncio
+import time
+from typing import Dict, Optional
+
+from alfred.circuit_breaker import RedisUnavailableError
+
+
+class DeferredCounterBuffer:
+    """
+    Counts requests against soft-limited fixed window counters without waiting on the store.
+
+    Increments are accumulated in process per counter key and coalesced, so fifty requests
+    become one `+50`, then written with a single `increment_many` call by a background task
+    every `flush_interval` seconds, as soon as `max_entries` keys are pending, and on
+    shutdown. The allow decision uses the count last returned by the store plus the local
+    delta, so a limit can be overshot by whatever other processes counted since the last
+    flush; use it for analytics and overage quotas, not hard enforcement.
+    """
+
+    def __init__(self, store, flush_interval: float, max_entries: int):
+        """
+        :param store: CounterStore providing `increment_many`.
+        :param flush_interval: Seconds between flushes.
+        :param max_entries: Pending keys that trigger an early flush.
+        """
+        self.store = store
+        self.flush_interval = flush_interval
+        self.max_entries = max_entries
+        self._pending: Dict[str, list] = {}
+        self._known: Dict[str, tuple] = {}
+        self._flushing: Dict[str, list] = {}
+        self._flush_lock = asyncio.Lock()
+        self._flush_requested: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def check_and_increment(self, key: str, limit: int, ttl: int, cost: int = 1) -> list:
+        """
+        Count a request against `key` unless its estimated count would exceed `limit`.
+
+        :param key: Fixed window counter key.
+        :param limit: Maximum allowed count per window.
+        :param ttl: Expiration in seconds applied when the counter is created.
+        :param cost: Units the request consumes.
+        :return: [allowed, estimated count, estimated remaining seconds].
+        """
+        now = time.monotonic()
+        known_count, known_until = self._known.get(key, (0, now + ttl))
+        if now >= known_until:
+            known_count, known_until = 0, now + ttl
+            self._known.pop(key, None)
+        pending = self._pending.get(key)
+        flushing = self._flushing.get(key)
+        count = known_count + (pending[0] if pending else 0) + (flushing[0] if flushing else 0)
+        seconds = max(1, int(known_until - now))
+        if count + cost > limit:
+            return [False, count, seconds]
+
+        if pending is None:
+            self._pending[key] = [cost, ttl]
+        else:
+            pending[0] += cost
+        self._ensure_started()
+        if len(self._pending) >= self.max_entries:
+            self._flush_requested.set()
+        return [True, count + cost, seconds]
+
+    def _ensure_started(self):
+        if self._task is None or self._task.done():
+            self._flush_requested = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            try:
+                await self.flush()
+            except RedisUnavailableError:
+                pass
+
+    async def flush(self) -> int:
+        """
+        Write every pending increment to the store. If the write fails, the increments are
+        kept and retried by the next flush.
+
+        :return: Number of counters written.
+        """
+        async with self._flush_lock:
+            return await self._flush()
+
+    async def _flush(self) -> int:
+        if not self._pending:
+            return 0
+        self._flushing, self._pending = self._pending, {}
+        increments = [(key, amount, ttl) for key, (amount, ttl) in self._flushing.items()]
+        try:
+            counts = await self.store.increment_many(increments)
+        except BaseException:
+            for key, (amount, ttl) in self._flushing.items():
+                entry = self._pending.setdefault(key, [0, ttl])
+                entry[0] += amount
+            raise
+        finally:
+            self._flushing = {}
+
+        now = time.monotonic()
+        if len(self._known) > 4 * self.max_entries:
+            self._known = {key: known for key, known in self._known.items() if now < known[1]}
+        for (key, amount, ttl), count in zip(increments, counts):
+            known = self._known.get(key)
+            self._known[key] = (count, known[1] if known and now < known[1] else now + ttl)
+        return len(increments)
+
+    async def aclose(self):
+        """
+        Stop the background task and flush the remaining increments. Called on shutdown.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
@@ -0,0 +1,75 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+class DenialCache:
+    """
+    Size-bounded, in-process LRU cache of counters known to be exhausted.
+
+    Each entry records the limit the counter was denied at and the monotonic time until
+    which it stays denied, taken from the remaining window Redis reports. Lookups let an
+    exhausted tenant be refused without any network I/O; the entry is ignored if the
+    rule's limit has since been raised.
+
+    The cache is local to the process: resets made elsewhere are only seen once entries
+    expire, which is why entries are capped at `max_ttl` seconds. Operations are guarded
+    by a lock, so the cache can be shared between threads.
+    """
+
+    def __init__(self, max_size: int, max_ttl: float):
+        """
+        :param max_size: Maximum number of entries kept; 0 disables the cache.
+        :param max_ttl: Maximum number of seconds an entry is trusted.
+        """
+        self.max_size = max_size
+        self.max_ttl = max_ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, limit: int, cost: int = 1) -> Optional[list]:
+        """
+        Return the cached denial for `key` as [False, count, seconds left], or None. A
+        denial only applies to requests costing at least as much as the denied one.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        denied_until, denied_limit, count, denied_cost = entry
+        remaining = denied_until - time.monotonic()
+        with self._lock:
+            if remaining <= 0 or limit > denied_limit:
+                self._entries.pop(key, None)
+                return None
+            if cost < denied_cost or key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+        return [False, count, max(1, int(remaining))]
+
+    def add(self, key: str, limit: int, count: int, seconds: int, cost: int = 1):
+        """
+        Record that `key` is denied at `limit`, for requests costing `cost` or more, for the
+        next `seconds` seconds.
+        """
+        if self.max_size <= 0 or seconds <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + min(seconds, self.max_ttl), limit, count, cost)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: str):
+        """
+        Drop the entries for `key` and for any counter derived from it (`key:...`).
+        """
+        prefix = f"{key}:"
+        with self._lock:
+            self._entries.pop(key, None)
+            for derived_key in [cached_key for cached_key in self._entries if cached_key.startswith(prefix)]:
+                del self._entries[derived_key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,61 @@
+import threading
+import time
+from typing import Dict, List, Tuple
+
+
+class FallbackCounter:
+    """
+    Approximate in-process counters used while Redis is unavailable.
+
+    Each process only sees its own traffic, so limits are enforced per process rather than
+    globally during an outage. Counts accumulated here are handed back by `drain` so they
+    can be added to the Redis counters once Redis recovers. Safe to share between threads.
+    """
+
+    def __init__(self, max_keys: int = 10000):
+        """
+        :param max_keys: Number of live keys above which expired entries are purged.
+        """
+        self.max_keys = max_keys
+        self._counters: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def check_and_increment(self, key: str, limit: int, ttl: int, reconcile: bool = True, cost: int = 1) -> list:
+        """
+        Count a request against the local counter for `key` unless it has reached `limit`.
+
+        :param key: Counter key.
+        :param limit: Maximum allowed count per window.
+        :param ttl: Window length in seconds.
+        :param reconcile: Whether the count should be handed back by `drain`; only fixed
+            window counters, which are plain integers in Redis, can be reconciled.
+        :param cost: Units the request consumes.
+        :return: [allowed, count, remaining seconds].
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._counters.get(key)
+            if entry is None or now >= entry[1]:
+                if len(self._counters) >= self.max_keys:
+                    self._purge(now)
+                entry = self._counters[key] = [0, now + max(1, ttl), reconcile]
+            seconds = max(1, int(entry[1] - now))
+            if entry[0] + cost > limit:
+                return [False, entry[0], seconds]
+            entry[0] += cost
+            return [True, entry[0], seconds]
+
+    def _purge(self, now: float):
+        for key in [key for key, entry in self._counters.items() if now >= entry[1]]:
+            del self._counters[key]
+
+    def drain(self) -> List[Tuple[str, int, int]]:
+        """
+        Remove every counter and return (key, count, remaining seconds) for the live ones
+        that can be reconciled.
+        """
+        now = time.monotonic()
+        with self._lock:
+            counters, self._counters = self._counters, {}
+        return [(key, count, int(expires_at - now)) for key, (count, expires_at, reconcile) in counters.items()
+                if reconcile and count and expires_at - now >= 1]
@@ -0,0 +1,192 @@
+import bisect
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, Sequence, Tuple
+
+# Upper bounds, in seconds, of the latency histogram buckets.
+DEFAULT_LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+class MetricsSink:
+    """
+    Receives hot-path measurements from ValidatorFactory, the validators and RedisManager.
+
+    Every method is a no-op here; subclass and override the ones you need. Instrumentation
+    is disabled entirely (a single `is None` check per call site) unless a sink is passed
+    as `metrics=` to ValidatorFactory or RedisManager.
+    """
+
+    def observe_stage(self, stage: str, rule_class_name: str, seconds: float):
+        """
+        Record the duration of a validation stage: `lookup`, `construction`, `check`,
+        `counter` or `validate_all`.
+        """
+
+    def count_decision(self, rule_class_name: str, allowed: bool, message: str):
+        """
+        Record a validation verdict, e.g. `MODEL_NOT_ALLOWED` or `MODEL_REQUEST_LIMIT_REACHED`.
+        """
+
+    def observe_redis_command(self, command: str, seconds: float, error: bool):
+        """
+        Record one Redis round trip.
+        """
+
+    def observe_pool(self, in_use: int, available: int, max_connections: int):
+        """
+        Record connection pool usage, sampled as each Redis round trip starts.
+        """
+
+
+class Histogram:
+    """
+    Cumulative latency histogram with fixed bucket bounds.
+    """
+    __slots__ = ("bounds", "counts", "total", "count")
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def cumulative(self):
+        """Yield (upper bound, cumulative count) pairs, ending with +Inf."""
+        running = 0
+        for bound, count in zip(self.bounds + (float("inf"),), self.counts):
+            running += count
+            yield bound, running
+
+
+class InMemoryMetricsSink(MetricsSink):
+    """
+    Aggregates measurements in process: counters and latency histograms keyed by labels.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.stage_latency: Dict[Tuple[str, str], Histogram] = {}
+        self.redis_latency: Dict[str, Histogram] = {}
+        self.redis_commands: Dict[Tuple[str, bool], int] = defaultdict(int)
+        self.decisions: Dict[Tuple[str, bool, str], int] = defaultdict(int)
+        self.pool_in_use = 0
+        self.pool_available = 0
+        self.pool_max_connections = 0
+        self.pool_in_use_peak = 0
+        self._lock = threading.Lock()
+
+    def _histogram(self, histograms: dict, labels) -> Histogram:
+        histogram = histograms.get(labels)
+        if histogram is None:
+            histogram = histograms[labels] = Histogram(self.buckets)
+        return histogram
+
+    def observe_stage(self, stage: str, rule_class_name: str, seconds: float):
+        with self._lock:
+            self._histogram(self.stage_latency, (stage, rule_class_name)).observe(seconds)
+
+    def count_decision(self, rule_class_name: str, allowed: bool, message: str):
+        with self._lock:
+            self.decisions[(rule_class_name, allowed, message)] += 1
+
+    def observe_redis_command(self, command: str, seconds: float, error: bool):
+        with self._lock:
+            self.redis_commands[(command, error)] += 1
+            self._histogram(self.redis_latency, command).observe(seconds)
+
+    def observe_pool(self, in_use: int, available: int, max_connections: int):
+        with self._lock:
+            self.pool_in_use = in_use
+            self.pool_available = available
+            self.pool_max_connections = max_connections
+            self.pool_in_use_peak = max(self.pool_in_use_peak, in_use)
+
+
+class PrometheusMetricsSink(InMemoryMetricsSink):
+    """
+    In-memory aggregator that renders the Prometheus text exposition format, for serving
+    from a `/metrics` endpoint.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS, prefix: str = "alfred"):
+        super().__init__(buckets)
+        self.prefix = prefix
+
+    @staticmethod
+    def _labels(**labels) -> str:
+        escaped = (
+            name + '="' + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+            for name, value in labels.items()
+        )
+        return "{" + ",".join(escaped) + "}"
+
+    def _render_histogram(self, lines: list, name: str, histogram: Histogram, **labels):
+        for bound, count in histogram.cumulative():
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f"{name}_bucket{self._labels(**labels, le=le)} {count}")
+        lines.append(f"{name}_sum{self._labels(**labels)} {histogram.total}")
+        lines.append(f"{name}_count{self._labels(**labels)} {histogram.count}")
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format.
+        """
+        p = self.prefix
+        lines = []
+        with self._lock:
+            lines.append(f"# TYPE {p}_validation_stage_seconds histogram")
+            for (stage, rule_class_name), histogram in self.stage_latency.items():
+                self._render_histogram(lines, f"{p}_validation_stage_seconds", histogram,
+                                       stage=stage, rule_class_name=rule_class_name)
+
+            lines.append(f"# TYPE {p}_validation_decisions_total counter")
+            for (rule_class_name, allowed, message), count in self.decisions.items():
+                labels = self._labels(rule_class_name=rule_class_name, allowed=str(allowed).lower(), message=message)
+                lines.append(f"{p}_validation_decisions_total{labels} {count}")
+
+            lines.append(f"# TYPE {p}_redis_command_seconds histogram")
+            for command, histogram in self.redis_latency.items():
+                self._render_histogram(lines, f"{p}_redis_command_seconds", histogram, command=command)
+
+            lines.append(f"# TYPE {p}_redis_commands_total counter")
+            for (command, error), count in self.redis_commands.items():
+                labels = self._labels(command=command, error=str(error).lower())
+                lines.append(f"{p}_redis_commands_total{labels} {count}")
+
+            lines.append(f"# TYPE {p}_redis_pool_connections gauge")
+            lines.append(f'{p}_redis_pool_connections{{state="in_use"}} {self.pool_in_use}')
+            lines.append(f'{p}_redis_pool_connections{{state="available"}} {self.pool_available}')
+            lines.append(f'{p}_redis_pool_connections{{state="max"}} {self.pool_max_connections}')
+            lines.append(f"# TYPE {p}_redis_pool_in_use_peak gauge")
+            lines.append(f"{p}_redis_pool_in_use_peak {self.pool_in_use_peak}")
+        return "\n".join(lines) + "\n"
+
+
+class CallbackMetricsSink(MetricsSink):
+    """
+    Forwards every measurement to `callback(event, labels, value)`, for bridging into an
+    existing metrics client (StatsD, OpenTelemetry, ...).
+    """
+
+    def __init__(self, callback: Callable[[str, dict, float], None]):
+        self.callback = callback
+
+    def observe_stage(self, stage: str, rule_class_name: str, seconds: float):
+        self.callback("validation_stage_seconds", {"stage": stage, "rule_class_name": rule_class_name}, seconds)
+
+    def count_decision(self, rule_class_name: str, allowed: bool, message: str):
+        self.callback(
+            "validation_decision", {"rule_class_name": rule_class_name, "allowed": allowed, "message": message}, 1
+        )
+
+    def observe_redis_command(self, command: str, seconds: float, error: bool):
+        self.callback("redis_command_seconds", {"command": command, "error": error}, seconds)
+
+    def observe_pool(self, in_use: int, available: int, max_connections: int):
+        self.callback("redis_pool_in_use", {"max_connections": max_connections}, in_use)
+        self.callback("redis_pool_available", {"max_connections": max_connections}, available)
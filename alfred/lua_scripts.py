@@ -0,0 +1,179 @@
+# Server-side scripts executed by RedisManager. Each runs atomically in a single round trip.
+
+# KEYS[i], i <= n: counter key
+# KEYS[n+i]: limit overrides hash of the tenant owning KEYS[i]
+# ARGV[5i-4]: limiter algorithm for KEYS[i] (see alfred.constants.LimiterAlgorithm)
+# ARGV[5i-3]: limit for KEYS[i]
+# ARGV[5i-2]: window in seconds; for fixed windows, the expiration applied when KEYS[i] is created
+# ARGV[5i-1]: field of KEYS[n+i] whose value, if set, replaces the limit; '' to skip the lookup
+# ARGV[5i]: units the request costs against KEYS[i]
+# Every counter is charged only if all of them allow the request.
+# Returns {allowed (0/1), count, seconds} flattened for each key, in order, where seconds is
+# the remaining window when allowed and the time until a request may be allowed again when denied.
+#
+# Each algorithm keeps O(1) state per key:
+#   fixed_window   - an integer counter expiring at the end of the window.
+#   sliding_window - a hash of the current window index and the current and previous window
+#                    counts; usage is estimated by weighting the previous count by the part of
+#                    it that still overlaps the rolling window.
+#   token_bucket   - the GCRA theoretical arrival time, allowing bursts of `limit` requests and
+#                    replenishing one request every window / limit seconds.
+CHECK_AND_INCREMENT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+
+local function fixed_window(key, limit, window, cost)
+    window = math.max(1, window)
+    local current = tonumber(redis.call('GET', key) or '0')
+    local ttl = redis.call('TTL', key)
+    if ttl < 0 then
+        ttl = window
+    end
+    local plan = {allowed = current + cost <= limit, count = current, seconds = ttl}
+    plan.commit = function()
+        local count = redis.call('INCRBY', key, cost)
+        local remaining = redis.call('TTL', key)
+        if remaining < 0 then
+            remaining = window
+            redis.call('EXPIRE', key, window)
+        end
+        return count, remaining
+    end
+    return plan
+end
+
+local function sliding_window(key, limit, window, cost)
+    local index = math.floor(now / window)
+    local state = redis.call('HMGET', key, 'w', 'c', 'p')
+    local stored_index = tonumber(state[1] or '-1')
+    local current, previous = 0, 0
+    if stored_index == index then
+        current, previous = tonumber(state[2]), tonumber(state[3])
+    elseif stored_index == index - 1 then
+        previous = tonumber(state[2])
+    end
+    local elapsed = (now - index * window) / window
+    local estimate = previous * (1 - elapsed) + current
+    local until_next_window = math.ceil((index + 1) * window - now)
+    local seconds = until_next_window
+    local spare = limit - cost - current
+    if spare >= 0 and previous > 0 then
+        seconds = math.max(1, math.ceil((1 - spare / previous - elapsed) * window))
+    end
+    local plan = {allowed = estimate + cost <= limit, count = math.floor(estimate), seconds = seconds}
+    plan.commit = function()
+        redis.call('HSET', key, 'w', index, 'c', current + cost, 'p', previous)
+        redis.call('EXPIRE', key, 2 * window)
+        return math.floor(estimate) + cost, until_next_window
+    end
+    return plan
+end
+
+local function token_bucket(key, limit, window, cost)
+    if limit <= 0 or cost > limit then
+        return {allowed = false, count = 0, seconds = window}
+    end
+    local interval = window / limit
+    local tat = math.max(tonumber(redis.call('GET', key) or '0'), now)
+    local new_tat = tat + interval * cost
+    local allow_at = new_tat - window
+    local plan = {
+        allowed = now >= allow_at,
+        count = math.min(limit, math.ceil((tat - now) / interval)),
+        seconds = math.max(1, math.ceil(allow_at - now)),
+    }
+    plan.commit = function()
+        -- A zero-cost request on an empty bucket leaves new_tat == now; PX must be positive.
+        redis.call('SET', key, tostring(new_tat), 'PX', math.max(1, math.ceil((new_tat - now) * 1000)))
+        return math.ceil((new_tat - now) / interval), math.ceil(new_tat - now)
+    end
+    return plan
+end
+
+local algorithms = {
+    fixed_window = fixed_window,
+    sliding_window = sliding_window,
+    token_bucket = token_bucket,
+}
+
+local n = #ARGV / 5
+local plans = {}
+local denied = false
+for i = 1, n do
+    local algorithm = algorithms[ARGV[5 * i - 4]] or fixed_window
+    local limit = tonumber(ARGV[5 * i - 3])
+    if ARGV[5 * i - 1] ~= '' then
+        limit = tonumber(redis.call('HGET', KEYS[n + i], ARGV[5 * i - 1]) or limit)
+    end
+    plans[i] = algorithm(KEYS[i], limit, tonumber(ARGV[5 * i - 2]), tonumber(ARGV[5 * i]))
+    if not plans[i].allowed then
+        denied = true
+    end
+end
+
+local result = {}
+for i = 1, n do
+    local plan = plans[i]
+    if denied then
+        result[#result + 1] = plan.allowed and 1 or 0
+        result[#result + 1] = plan.count
+        result[#result + 1] = plan.seconds
+    else
+        local count, seconds = plan.commit()
+        result[#result + 1] = 1
+        result[#result + 1] = count
+        result[#result + 1] = seconds
+    end
+end
+return result
+"""
+
+# KEYS[1]: fixed window counter key, KEYS[2]: limit overrides hash of its tenant
+# ARGV[1]: limit, ARGV[2]: block size, ARGV[3]: expiration in seconds applied when KEYS[1] is created
+# ARGV[4]: field of KEYS[2] whose value, if set, replaces the limit; '' to skip the lookup
+# Reserves up to ARGV[2] units without exceeding the limit.
+# Returns {granted units, count after the reservation, remaining ttl}.
+RESERVE_BLOCK = """
+local limit = tonumber(ARGV[1])
+if ARGV[4] ~= '' then
+    limit = tonumber(redis.call('HGET', KEYS[2], ARGV[4]) or limit)
+end
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local granted = math.min(tonumber(ARGV[2]), limit - current)
+local ttl = redis.call('TTL', KEYS[1])
+if granted <= 0 then
+    if ttl < 0 then
+        ttl = math.max(1, tonumber(ARGV[3]))
+    end
+    return {0, current, ttl}
+end
+local count = redis.call('INCRBY', KEYS[1], granted)
+if ttl < 0 then
+    ttl = math.max(1, tonumber(ARGV[3]))
+    redis.call('EXPIRE', KEYS[1], ttl)
+end
+return {granted, count, ttl}
+"""
+
+# KEYS[1]: fixed window counter key
+# ARGV[1]: unused units to give back
+# Never recreates an expired counter or takes it below zero. Returns the units released.
+RELEASE_BLOCK = """
+local units = math.min(tonumber(ARGV[1]), tonumber(redis.call('GET', KEYS[1]) or '0'))
+if units > 0 then
+    redis.call('DECRBY', KEYS[1], units)
+end
+return units
+"""
+
+# KEYS[1]: fixed window counter key
+# ARGV[1]: units to add, e.g. counted locally while Redis was unavailable
+# ARGV[2]: expiration in seconds applied when KEYS[1] has none
+# Returns the count after adding the units.
+INCREMENT = """
+local count = redis.call('INCRBY', KEYS[1], tonumber(ARGV[1]))
+if redis.call('TTL', KEYS[1]) < 0 then
+    redis.call('EXPIRE', KEYS[1], math.max(1, tonumber(ARGV[2])))
+end
+return count
+"""
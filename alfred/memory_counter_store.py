@@ -0,0 +1,167 @@
+import heapq
+import math
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from alfred.constants import LimiterAlgorithm
+from alfred.counter_store import CounterStore, normalize_counter
+from alfred.denial_cache import DenialCache
+from alfred.instrumentation import MetricsSink
+
+
+class InMemoryCounterStore(CounterStore):
+    """
+    Counter store keeping every counter in process memory, for single-node deployments,
+    tests and benchmarks that should not need a Redis server.
+
+    The algorithms mirror the Redis Lua scripts: fixed window counters are integers,
+    sliding windows keep the current window index and the current and previous counts, and
+    token buckets keep the GCRA theoretical arrival time. No method awaits while it reads or
+    writes counters, so each call is atomic with respect to other coroutines on the event
+    loop. Expired keys are evicted lazily from a heap of expiry times as operations run;
+    no per-key timers or tasks are created.
+
+    Counters are not shared between processes and are lost on restart. Limit overrides
+    are not supported: `limit_field` is ignored.
+    """
+
+    def __init__(self, metrics: Optional[MetricsSink] = None, clock: Callable[[], float] = time.time):
+        """
+        :param metrics: Optional sink, read by validators to report stage timings and verdicts.
+        :param clock: Source of the current time in seconds; windows are aligned on it.
+        """
+        self.metrics = metrics
+        self.denial_cache = DenialCache(max_size=0, max_ttl=0)
+        self._clock = clock
+        self._values: Dict[str, object] = {}
+        self._expires_at: Dict[str, float] = {}
+        self._expiry_heap: List[Tuple[float, str]] = []
+
+    def _evict_expired(self, now: float):
+        """Drop every key whose expiry has passed, skipping heap entries that were superseded."""
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= now:
+            expires_at, key = heapq.heappop(heap)
+            if self._expires_at.get(key) == expires_at:
+                del self._expires_at[key]
+                del self._values[key]
+
+    def _expire(self, key: str, expires_at: float):
+        """Set the expiry of `key`, compacting the heap once superseded entries dominate it."""
+        self._expires_at[key] = expires_at
+        heapq.heappush(self._expiry_heap, (expires_at, key))
+        if len(self._expiry_heap) > 2 * len(self._expires_at) + 64:
+            self._expiry_heap = [(at, each) for each, at in self._expires_at.items()]
+            heapq.heapify(self._expiry_heap)
+
+    def _seconds_left(self, key: str, now: float) -> Optional[int]:
+        expires_at = self._expires_at.get(key)
+        return None if expires_at is None else max(1, math.ceil(expires_at - now))
+
+    def _fixed_window(self, key: str, limit: int, window: int, cost: int, now: float):
+        window = max(1, window)
+        current = self._values.get(key, 0)
+        if not isinstance(current, int):
+            raise ValueError(f"Key '{key}' does not hold a fixed window counter.")
+        seconds = self._seconds_left(key, now) or window
+
+        def commit():
+            self._values[key] = current + cost
+            if key not in self._expires_at:
+                self._expire(key, now + window)
+            return current + cost, self._seconds_left(key, now)
+
+        return current + cost <= limit, current, seconds, commit
+
+    def _sliding_window(self, key: str, limit: int, window: int, cost: int, now: float):
+        index = math.floor(now / window)
+        stored_index, current, previous = self._values.get(key, (-1, 0, 0))
+        if stored_index == index - 1:
+            current, previous = 0, current
+        elif stored_index != index:
+            current, previous = 0, 0
+        elapsed = (now - index * window) / window
+        estimate = previous * (1 - elapsed) + current
+        until_next_window = math.ceil((index + 1) * window - now)
+        seconds = until_next_window
+        spare = limit - cost - current
+        if spare >= 0 and previous > 0:
+            seconds = max(1, math.ceil((1 - spare / previous - elapsed) * window))
+
+        def commit():
+            self._values[key] = (index, current + cost, previous)
+            self._expire(key, now + 2 * window)
+            return math.floor(estimate) + cost, until_next_window
+
+        return estimate + cost <= limit, math.floor(estimate), seconds, commit
+
+    def _token_bucket(self, key: str, limit: int, window: int, cost: int, now: float):
+        if limit <= 0 or cost > limit:
+            return False, 0, window, None
+        interval = window / limit
+        tat = max(self._values.get(key, 0.0), now)
+        new_tat = tat + interval * cost
+        allow_at = new_tat - window
+
+        def commit():
+            self._values[key] = new_tat
+            self._expire(key, new_tat)
+            return math.ceil((new_tat - now) / interval), math.ceil(new_tat - now)
+
+        count = min(limit, math.ceil((tat - now) / interval))
+        return now >= allow_at, count, max(1, math.ceil(allow_at - now)), commit
+
+    async def check_and_increment_many(self, counters: Sequence[tuple]) -> List[list]:
+        now = self._clock()
+        self._evict_expired(now)
+        algorithms = {
+            LimiterAlgorithm.FIXED_WINDOW: self._fixed_window,
+            LimiterAlgorithm.SLIDING_WINDOW: self._sliding_window,
+            LimiterAlgorithm.TOKEN_BUCKET: self._token_bucket,
+        }
+        plans = [
+            algorithms[LimiterAlgorithm(algorithm)](key, int(limit), int(ttl), int(cost), now)
+            for key, limit, ttl, algorithm, _, cost in map(normalize_counter, counters)
+        ]
+        if all(allowed for allowed, _, _, _ in plans):
+            return [[True, *commit()] for _, _, _, commit in plans]
+        return [[allowed, count, seconds] for allowed, count, seconds, _ in plans]
+
+    async def increment(self, key: str, amount: int, ttl: int) -> int:
+        now = self._clock()
+        self._evict_expired(now)
+        current = self._values.get(key, 0)
+        if not isinstance(current, int):
+            raise ValueError(f"Key '{key}' does not hold a fixed window counter.")
+        self._values[key] = current + amount
+        if key not in self._expires_at:
+            self._expire(key, now + max(1, ttl))
+        return current + amount
+
+    async def get_many(self, keys: Sequence[str]) -> List[int]:
+        self._evict_expired(self._clock())
+        values = [self._values.get(key, 0) for key in keys]
+        return [value if isinstance(value, int) else 0 for value in values]
+
+    async def ttl(self, key: str) -> int:
+        now = self._clock()
+        self._evict_expired(now)
+        if key not in self._values:
+            return -2
+        return self._seconds_left(key, now) or -1
+
+    async def reset(self, key: str) -> int:
+        prefix = f"{key}:"
+        deleted = [each for each in self._values if each == key or each.startswith(prefix)]
+        for each in deleted:
+            del self._values[each]
+            self._expires_at.pop(each, None)
+        return len(deleted)
+
+    def clear(self):
+        """
+        Delete every counter.
+        """
+        self._values.clear()
+        self._expires_at.clear()
+        self._expiry_heap.clear()
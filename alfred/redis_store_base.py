@@ -0,0 +1,99 @@
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from redis.crc import key_slot
+
+from alfred.circuit_breaker import CircuitBreaker
+from alfred.constants import LimiterAlgorithm
+from alfred.counter_store import CounterKeyScheme, normalize_counter
+from alfred.denial_cache import DenialCache
+from alfred.fallback_counter import FallbackCounter
+from alfred.instrumentation import MetricsSink
+
+CLUSTER_URL_SCHEMES = {"redis+cluster": "redis", "rediss+cluster": "rediss"}
+
+
+def group_by_slot(counters: Sequence[tuple]) -> Dict[int, List[int]]:
+    """Map each Redis Cluster hash slot to the indexes of the counters whose key it holds."""
+    slots = defaultdict(list)
+    for index, (key, *_) in enumerate(counters):
+        slots[key_slot(key.encode())].append(index)
+    return slots
+
+
+def check_and_increment_arguments(counters: Sequence[tuple]) -> Tuple[List[str], list]:
+    """Build the KEYS and ARGV of the check-and-increment script, see `lua_scripts`."""
+    keys = [counter[0] for counter in counters]
+    keys += [CounterKeyScheme.limits_key(key) for key in keys]
+    args = [
+        value
+        for _, limit, ttl, algorithm, limit_field, cost in map(normalize_counter, counters)
+        for value in (LimiterAlgorithm(algorithm).value, limit, ttl, limit_field, cost)
+    ]
+    return keys, args
+
+
+def parse_check_and_increment(flat: Sequence) -> List[list]:
+    """Split the check-and-increment script's flat reply into [allowed, count, seconds] per counter."""
+    return [[bool(flat[i]), int(flat[i + 1]), int(flat[i + 2])] for i in range(0, len(flat), 3)]
+
+
+class RedisStoreBase(CounterKeyScheme):
+    """
+    State and helpers shared by `RedisManager` and `SyncRedisManager`, which differ only
+    in how they make round trips: URL and cluster resolution, the denial cache, the
+    circuit breaker and the local fallback counters used while Redis is unavailable.
+    """
+
+    def _resolve_url(self, redis_url: str, cluster: bool) -> Tuple[str, bool]:
+        """
+        Remember `redis_url` and strip its cluster scheme, if any.
+
+        :return: (URL to connect to, whether to connect to a Redis Cluster).
+        """
+        self.redis_url = redis_url
+        scheme, separator, rest = redis_url.partition("://")
+        if scheme in CLUSTER_URL_SCHEMES:
+            return f"{CLUSTER_URL_SCHEMES[scheme]}{separator}{rest}", True
+        return redis_url, cluster
+
+    def _init_resilience(
+        self,
+        denial_cache_size: int,
+        denial_cache_max_ttl: float,
+        metrics: Optional[MetricsSink],
+        call_timeout: Optional[float],
+        failure_threshold: int,
+        recovery_timeout: float,
+    ):
+        """
+        Set up the denial cache, metrics sink, circuit breaker and fallback counters. The
+        breaker calls `_schedule_reconcile` when it closes again.
+        """
+        self.denial_cache = DenialCache(max_size=denial_cache_size, max_ttl=denial_cache_max_ttl)
+        self.metrics = metrics
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold, recovery_timeout, call_timeout, on_close=self._schedule_reconcile
+        )
+        self.fallback_counters = FallbackCounter()
+
+    def check_and_increment_local(
+        self, key: str, limit: int, ttl: int, algorithm: LimiterAlgorithm = LimiterAlgorithm.FIXED_WINDOW, cost: int = 1
+    ) -> list:
+        """
+        Count a request against an approximate in-process counter, for rules whose failure
+        policy is `local` while Redis is unavailable. Every algorithm is approximated by a
+        fixed window of `ttl` seconds, enforced per process.
+
+        :return: [allowed, count, remaining seconds].
+        """
+        return self.fallback_counters.check_and_increment(
+            key, limit, ttl, reconcile=LimiterAlgorithm(algorithm) == LimiterAlgorithm.FIXED_WINDOW, cost=cost
+        )
+
+    def _remember_denials(self, counters: Sequence[tuple], results: List[list]) -> List[list]:
+        """Add every counter `results` denies to the denial cache, and return `results`."""
+        for (key, limit, _, _, _, cost), (allowed, count, seconds) in zip(map(normalize_counter, counters), results):
+            if not allowed:
+                self.denial_cache.add(key, limit, count, seconds, cost)
+        return results
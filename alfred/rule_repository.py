@@ -0,0 +1,340 @@
+import asyncio
+import hashlib
+import json
+import os
+from abc import ABC, abstractmethod
+from types import MappingProxyType
+from typing import Awaitable, Callable, Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+from alfred.validations.base import BaseValidation
+
+RulesCallback = Callable[[], Union[Iterable[dict], Awaitable[Iterable[dict]]]]
+# Memo key shared by every endpoint no rule names, which all select the same validators.
+_UNKNOWN_ENDPOINT = object()
+
+
+def _rules_version(rules: List[dict]) -> str:
+    """Hash a rule set, so sources without an explicit version still detect changes."""
+    return hashlib.sha1(json.dumps(rules, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class RuleSource(ABC):
+    """
+    Where a RuleRepository loads its rules from.
+
+    `version` must be cheap, since it is polled; `load` is only called when it changes.
+    """
+
+    async def version(self) -> Optional[str]:
+        """
+        Return an identifier that changes whenever the rule set does.
+        """
+        return (await self.load())[0]
+
+    @abstractmethod
+    async def load(self) -> Tuple[str, List[dict]]:
+        """
+        Return the current version and every rule JSON.
+        """
+
+
+class FileRuleSource(RuleSource):
+    """
+    Rules stored in a JSON file, either as a list of rules or as
+    `{"version": ..., "rules": [...]}`. The source's version is the file's modification
+    time and size, so polling never reads the file; the document's own `version`, if any,
+    is kept in `document_version` after each load.
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: Path of the JSON file.
+        """
+        self.path = path
+        self.document_version: Optional[str] = None
+
+    async def version(self) -> Optional[str]:
+        stat = await asyncio.to_thread(os.stat, self.path)
+        return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+    def _read(self) -> Tuple[str, List[dict]]:
+        stat = os.stat(self.path)
+        with open(self.path) as rules_file:
+            document = json.load(rules_file)
+        version = f"{stat.st_mtime_ns}:{stat.st_size}"
+        if isinstance(document, dict):
+            self.document_version = None if document.get("version") is None else str(document["version"])
+            return version, list(document["rules"])
+        self.document_version = None
+        return version, list(document)
+
+    async def load(self) -> Tuple[str, List[dict]]:
+        return await asyncio.to_thread(self._read)
+
+
+class RedisHashRuleSource(RuleSource):
+    """
+    Rules stored in a Redis hash mapping each rule id to its rule JSON.
+
+    Writers should bump `version_key` (e.g. with INCR) after changing the hash; without a
+    version key the whole hash is read and hashed on every poll.
+    """
+
+    def __init__(self, client, rules_key: str, version_key: Optional[str] = None):
+        """
+        :param client: Async Redis client, e.g. `RedisManager.client`; it must decode responses.
+        :param rules_key: Key of the hash holding the rules.
+        :param version_key: Key of a string bumped whenever the hash changes.
+        """
+        self.client = client
+        self.rules_key = rules_key
+        self.version_key = version_key
+
+    async def version(self) -> Optional[str]:
+        if self.version_key is None:
+            return await super().version()
+        return await self.client.get(self.version_key)
+
+    async def load(self) -> Tuple[str, List[dict]]:
+        if self.version_key is None:
+            encoded = await self.client.hgetall(self.rules_key)
+            rules = [json.loads(rule) for _, rule in sorted(encoded.items())]
+            return _rules_version(rules), rules
+        async with self.client.pipeline(transaction=True) as pipe:
+            version, encoded = await pipe.get(self.version_key).hgetall(self.rules_key).execute()
+        return version, [json.loads(rule) for _, rule in sorted(encoded.items())]
+
+
+class CallbackRuleSource(RuleSource):
+    """
+    Rules returned by a sync or async callback, e.g. a call to a configuration service.
+    The version is taken from `version_callback` if given, else from the rules' content.
+    """
+
+    def __init__(self, callback: RulesCallback, version_callback: Optional[Callable[[], object]] = None):
+        """
+        :param callback: Returns every rule JSON; may be a coroutine function.
+        :param version_callback: Returns the current version; may be a coroutine function.
+        """
+        self.callback = callback
+        self.version_callback = version_callback
+
+    @staticmethod
+    async def _call(callback):
+        result = callback()
+        if asyncio.iscoroutine(result):
+            result = await result
+        return result
+
+    async def version(self) -> Optional[str]:
+        if self.version_callback is None:
+            return await super().version()
+        return str(await self._call(self.version_callback))
+
+    async def load(self) -> Tuple[str, List[dict]]:
+        rules = list(await self._call(self.callback))
+        if self.version_callback is None:
+            return _rules_version(rules), rules
+        return str(await self._call(self.version_callback)), rules
+
+
+class RuleSnapshot:
+    """
+    An immutable, compiled rule set.
+
+    Validators are indexed by rule id, by plan (the rule's `plan` field, else the package
+    of its validator, e.g. `free_plan`) and by endpoint (the rule's `condition_endpoints`;
+    rules without endpoints apply to every endpoint).
+    """
+    __slots__ = ("version", "rules", "validators", "_order", "_by_plan", "_by_endpoint", "_any_endpoint", "_selections")
+
+    def __init__(self, version: Optional[str], rules: Iterable[dict], factory):
+        """
+        :param version: Version of the source the rules were loaded from.
+        :param rules: Rule JSONs.
+        :param factory: ValidatorFactory used to compile each rule.
+        :raises ValueError: If a rule cannot be compiled.
+        """
+        by_plan: Dict[str, list] = {}
+        by_endpoint: Dict[str, list] = {}
+        any_endpoint = []
+        rules_by_id = {}
+        validators = {}
+        for rule_json in rules:
+            validator = factory.load_validator(rule_json)
+            rules_by_id[validator.rule_id] = rule_json
+            validators[validator.rule_id] = validator
+            plan = rule_json.get("plan") or self._default_plan(validator)
+            by_plan.setdefault(plan, []).append(validator)
+            endpoints = rule_json.get("conditions", {}).get("condition_endpoints")
+            if not endpoints:
+                any_endpoint.append(validator)
+            for endpoint in endpoints or ():
+                by_endpoint.setdefault(endpoint, []).append(validator)
+
+        self.version = version
+        self.rules: Mapping[object, dict] = MappingProxyType(rules_by_id)
+        self.validators: Mapping[object, BaseValidation] = MappingProxyType(validators)
+        self._order = {id(validator): index for index, validator in enumerate(validators.values())}
+        self._by_plan = {plan: tuple(each) for plan, each in by_plan.items()}
+        self._by_endpoint = {endpoint: tuple(each) for endpoint, each in by_endpoint.items()}
+        self._selections: Dict[Tuple[Optional[str], Optional[str]], Tuple[BaseValidation, ...]] = {}
+        self._any_endpoint = tuple(any_endpoint)
+
+    def __setattr__(self, name, value):
+        if hasattr(self, "_any_endpoint"):
+            raise AttributeError("RuleSnapshot is immutable.")
+        super().__setattr__(name, value)
+
+    @staticmethod
+    def _default_plan(validator: BaseValidation) -> str:
+        """The package of the validator's module, or the module itself if it is top-level."""
+        module = type(validator).__module__
+        package = module.rpartition(".")[0]
+        return package.rpartition(".")[2] or module
+
+    def select(self, plan: Optional[str] = None, endpoint: Optional[str] = None) -> Tuple[BaseValidation, ...]:
+        """
+        Return the validators of a plan that apply to an endpoint, in rule order.
+        Either filter may be omitted. Selections are memoized per known plan and endpoint;
+        endpoints no rule names share one entry, so request data cannot grow the memo.
+        """
+        if plan is not None and plan not in self._by_plan:
+            return ()
+        if endpoint is not None and endpoint not in self._by_endpoint:
+            endpoint = _UNKNOWN_ENDPOINT
+        selection = self._selections.get((plan, endpoint))
+        if selection is None:
+            selection = self._selections[(plan, endpoint)] = self._select(plan, endpoint)
+        return selection
+
+    def _select(self, plan: Optional[str], endpoint: Optional[str]) -> Tuple[BaseValidation, ...]:
+        if plan is None and endpoint is None:
+            return tuple(self.validators.values())
+        if endpoint is None:
+            return self._by_plan.get(plan, ())
+        matching = self._by_endpoint.get(endpoint, ()) + self._any_endpoint
+        if plan is not None:
+            in_plan = set(map(id, self._by_plan.get(plan, ())))
+            matching = tuple(validator for validator in matching if id(validator) in in_plan)
+        return tuple(sorted(matching, key=lambda validator: self._order[id(validator)]))
+
+
+class RuleRepository:
+    """
+    Holds the current RuleSnapshot of a rule source and swaps in a new one when the source's
+    version changes.
+
+    Swapping is a single reference assignment: a validation that already took a snapshot
+    keeps using it, and requests never parse or compile rules between changes. A failed
+    reload keeps the previous snapshot and records the error in `last_error`.
+    """
+
+    def __init__(self, source: RuleSource, factory):
+        """
+        :param source: Where rules are loaded from.
+        :param factory: ValidatorFactory used to compile rules and run validations.
+        """
+        self.source = source
+        self.factory = factory
+        self.last_error: Optional[Exception] = None
+        self._snapshot: Optional[RuleSnapshot] = None
+        self._refresh_lock = asyncio.Lock()
+        self._watch_task: Optional[asyncio.Task] = None
+
+    @property
+    def snapshot(self) -> RuleSnapshot:
+        """
+        The current snapshot.
+
+        :raises ValueError: If no rules have been loaded yet.
+        """
+        if self._snapshot is None:
+            raise ValueError("No rules loaded; call `refresh()` or `start()` first.")
+        return self._snapshot
+
+    async def refresh(self, force: bool = False) -> bool:
+        """
+        Load and compile the rules if the source's version changed.
+
+        :param force: Reload even if the version is unchanged.
+        :return: Whether a new snapshot was swapped in.
+        :raises ValueError: If a rule cannot be compiled; the previous snapshot is kept.
+        """
+        async with self._refresh_lock:
+            if not force and self._snapshot is not None:
+                if await self.source.version() == self._snapshot.version:
+                    return False
+            version, rules = await self.source.load()
+            if not force and self._snapshot is not None and version == self._snapshot.version:
+                return False
+            self._snapshot = RuleSnapshot(version, rules, self.factory)
+            return True
+
+    async def validate(self, plan: Optional[str] = None, endpoint: Optional[str] = None, **kwargs) -> list:
+        """
+        Validate a request against the current snapshot's rules for `plan` and `endpoint`.
+
+        :param plan: Plan whose rules apply, or None for every plan.
+        :param endpoint: Requested endpoint, also passed to the validators.
+        :param kwargs: Other request data, e.g. `user_id`, `org_id` and `model_used`.
+        :return: [allowed, {"rules": {rule_id: verdict}}, message], see `ValidatorFactory.validate_all`.
+        """
+        if endpoint is not None:
+            kwargs["endpoint"] = endpoint
+        return await self.factory.validate_compiled(self.snapshot.select(plan, endpoint), **kwargs)
+
+    async def start(self, poll_interval: float = 5.0, keyspace_notifications: bool = False):
+        """
+        Load the rules, then watch the source in a background task.
+
+        :param poll_interval: Seconds between version checks.
+        :param keyspace_notifications: For a RedisHashRuleSource with a version key, refresh
+            as soon as the version key is written, using Redis keyspace notifications
+            (`notify-keyspace-events` must include `K` and `$` or `A`). Polling continues
+            as a fallback at `poll_interval`.
+        """
+        await self.refresh()
+        if self._watch_task is None or self._watch_task.done():
+            self._watch_task = asyncio.get_running_loop().create_task(
+                self._watch(poll_interval, keyspace_notifications)
+            )
+
+    async def stop(self):
+        """
+        Stop watching the source.
+        """
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
+
+    async def _refresh_quietly(self):
+        try:
+            await self.refresh()
+            self.last_error = None
+        except Exception as error:
+            self.last_error = error
+
+    async def _watch(self, poll_interval: float, keyspace_notifications: bool):
+        if keyspace_notifications and isinstance(self.source, RedisHashRuleSource) and self.source.version_key:
+            await self._watch_keyspace(poll_interval)
+        while True:
+            await asyncio.sleep(poll_interval)
+            await self._refresh_quietly()
+
+    async def _watch_keyspace(self, poll_interval: float):
+        """Refresh on every write to the version key, or after `poll_interval` seconds without one."""
+        pubsub = self.source.client.pubsub()
+        try:
+            await pubsub.psubscribe(f"__keyspace@*__:{self.source.version_key}")
+            while True:
+                await pubsub.get_message(ignore_subscribe_messages=True, timeout=poll_interval)
+                await self._refresh_quietly()
+        except Exception as error:
+            self.last_error = error
+        finally:
+            await pubsub.aclose()
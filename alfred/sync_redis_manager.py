@@ -0,0 +1,327 @@
+import threading
+import time
+from typing import List, Optional, Sequence
+
+import redis
+from redis.cluster import RedisCluster
+
+from alfred import lua_scripts
+from alfred.circuit_breaker import RedisUnavailableError
+from alfred.config.settings import loaded_config
+from alfred.constants import LimiterAlgorithm, ResetPeriod
+from alfred.instrumentation import MetricsSink
+from alfred.redis_store_base import (
+    RedisStoreBase,
+    check_and_increment_arguments,
+    group_by_slot,
+    parse_check_and_increment,
+)
+
+
+class SyncRedisManager(RedisStoreBase):
+    """
+    Counter store backed by a pooled synchronous Redis client, for WSGI apps, Celery
+    workers and other code without an event loop. Use it through
+    `ValidatorFactory(redis_url, sync=True)` and `validate_sync`.
+
+    It shares the key scheme, Lua scripts, denial cache, circuit breaker and failure
+    policies of `RedisManager`, so sync and async processes can enforce the same limits
+    on the same counters. Quota leases and deferred increments are not supported: those
+    counters are charged directly.
+
+    One instance is meant to be shared by every thread of a process. Connections come from
+    a blocking pool, so threads beyond `max_connections` wait up to `socket_connect_timeout`
+    for one instead of failing, and the in-process caches are guarded by locks. Call
+    `close()` on shutdown.
+    """
+    synchronous = True
+
+    def __init__(
+        self,
+        redis_url: str,
+        max_connections: int = loaded_config.REDIS_MAX_CONNECTIONS,
+        health_check_interval: int = loaded_config.REDIS_HEALTH_CHECK_INTERVAL,
+        socket_timeout: Optional[float] = loaded_config.REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout: Optional[float] = loaded_config.REDIS_SOCKET_CONNECT_TIMEOUT,
+        denial_cache_size: int = loaded_config.DENIAL_CACHE_SIZE,
+        denial_cache_max_ttl: float = loaded_config.DENIAL_CACHE_MAX_TTL,
+        client: Optional[redis.Redis] = None,
+        metrics: Optional[MetricsSink] = None,
+        cluster: bool = loaded_config.REDIS_CLUSTER,
+        call_timeout: Optional[float] = loaded_config.REDIS_CALL_TIMEOUT,
+        failure_threshold: int = loaded_config.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+        recovery_timeout: float = loaded_config.CIRCUIT_BREAKER_RECOVERY_TIMEOUT,
+    ):
+        """
+        Initialize the connection pool and client.
+
+        :param redis_url: Full Redis URL, see `RedisManager`.
+        :param max_connections: Upper bound on pooled connections.
+        :param health_check_interval: Seconds of idleness after which a connection is pinged before reuse.
+        :param socket_timeout: Seconds to wait on a socket read or write.
+        :param socket_connect_timeout: Seconds to wait when opening a connection, or for a
+            free pooled connection.
+        :param denial_cache_size: Exhausted counters remembered in process; 0 disables the cache.
+        :param denial_cache_max_ttl: Maximum seconds a cached denial is trusted.
+        :param client: Pre-built sync client (e.g. an in-memory fake) to use instead of
+            building a pool from `redis_url`; it must decode responses.
+        :param metrics: Optional sink receiving command latencies and pool usage.
+        :param cluster: Connect to a Redis Cluster through `redis_url`'s node.
+        :param call_timeout: Deadline in seconds for each Redis round trip, applied as the
+            socket timeout when it is shorter; None disables it.
+        :param failure_threshold: Consecutive failed round trips that open the circuit breaker.
+        :param recovery_timeout: Seconds the circuit breaker stays open before probing Redis.
+        """
+        redis_url, cluster = self._resolve_url(redis_url, cluster)
+        self.cluster = cluster or isinstance(client, RedisCluster)
+        if call_timeout is not None:
+            socket_timeout = call_timeout if socket_timeout is None else min(socket_timeout, call_timeout)
+
+        if client is None and cluster:
+            client = RedisCluster.from_url(
+                redis_url,
+                max_connections=max_connections,
+                health_check_interval=health_check_interval,
+                socket_timeout=socket_timeout,
+                socket_connect_timeout=socket_connect_timeout,
+                decode_responses=True,
+            )
+            self.pool = None
+        elif client is None:
+            self.pool = redis.BlockingConnectionPool.from_url(
+                redis_url,
+                max_connections=max_connections,
+                timeout=socket_connect_timeout,
+                health_check_interval=health_check_interval,
+                socket_timeout=socket_timeout,
+                socket_connect_timeout=socket_connect_timeout,
+                decode_responses=True,
+            )
+            client = redis.Redis(connection_pool=self.pool)
+        else:
+            self.pool = getattr(client, "connection_pool", None)
+        self.client = client
+        self.check_and_increment_script = self.client.register_script(lua_scripts.CHECK_AND_INCREMENT)
+        self.increment_script = self.client.register_script(lua_scripts.INCREMENT)
+        self._init_resilience(
+            denial_cache_size, denial_cache_max_ttl, metrics, call_timeout, failure_threshold, recovery_timeout
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def load_scripts(self):
+        """
+        Preload the Lua scripts so the first request does not pay for a NOSCRIPT retry.
+        """
+        for script in (lua_scripts.CHECK_AND_INCREMENT, lua_scripts.INCREMENT):
+            self.client.script_load(script)
+
+    def close(self):
+        """
+        Reconcile local fallback counts, then close the client and disconnect every pooled
+        connection.
+        """
+        try:
+            self.reconcile_fallback_counts()
+        except RedisUnavailableError:
+            pass
+        self.client.close()
+        if self.pool is not None:
+            self.pool.disconnect()
+
+    def _execute(self, command: str, function, *args, **kwargs):
+        """
+        Make a Redis round trip under the circuit breaker, reporting its latency to
+        `metrics` along with the pool usage seen as it starts.
+
+        :raises RedisUnavailableError: If the breaker is open, or the call fails or times out.
+        """
+        if self.metrics is None:
+            return self.circuit_breaker.call_sync(function, *args, **kwargs)
+        idle = [connection for connection in getattr(getattr(self.pool, "pool", None), "queue", ()) if connection]
+        self.metrics.observe_pool(
+            in_use=len(getattr(self.pool, "_connections", ())) - len(idle),
+            available=len(idle),
+            max_connections=getattr(self.pool, "max_connections", 0),
+        )
+        start = time.perf_counter()
+        error = True
+        try:
+            result = self.circuit_breaker.call_sync(function, *args, **kwargs)
+            error = False
+            return result
+        finally:
+            self.metrics.observe_redis_command(command, time.perf_counter() - start, error)
+
+    def _schedule_reconcile(self):
+        """Reconcile local fallback counts in a background thread once the breaker closes."""
+        threading.Thread(target=self._reconcile_quietly, name="alfred-reconcile", daemon=True).start()
+
+    def _reconcile_quietly(self):
+        try:
+            self.reconcile_fallback_counts()
+        except RedisUnavailableError:
+            pass
+
+    def reconcile_fallback_counts(self) -> int:
+        """
+        Add the requests counted locally while Redis was unavailable to their Redis
+        counters, see `RedisManager.reconcile_fallback_counts`.
+
+        :return: Number of counters reconciled.
+        """
+        reconciled = 0
+        for key, count, ttl in self.fallback_counters.drain():
+            self.increment(key, count, ttl)
+            reconciled += 1
+        return reconciled
+
+    def check_and_increment(
+        self,
+        key: str,
+        limit: int,
+        ttl: int,
+        algorithm: LimiterAlgorithm = LimiterAlgorithm.FIXED_WINDOW,
+        limit_field: str = "",
+        cost: int = 1,
+    ) -> list:
+        """
+        Atomically count a request against the counter at `key` unless it would exceed
+        `limit`, see `CounterStore.check_and_increment`.
+
+        :return: [allowed, count, seconds].
+        """
+        cached = self.denial_cache.get(key, limit, cost)
+        if cached is not None:
+            return cached
+        return self.check_and_increment_many([(key, limit, ttl, algorithm, limit_field, cost)])[0]
+
+    def check_and_increment_many(self, counters: Sequence[tuple]) -> List[list]:
+        """
+        Check and increment several counters atomically in one round trip, see
+        `RedisManager.check_and_increment_many`. On a Redis Cluster, counters of different
+        hash slots are sent as one script per slot, one after the other.
+
+        :param counters: (key, limit, ttl, algorithm[, limit_field[, cost]]) for each counter.
+        :return: [allowed, count, seconds] for each counter, in order.
+        """
+        slots = group_by_slot(counters) if self.cluster else {}
+        if len(slots) > 1:
+            results = [None] * len(counters)
+            for indexes in slots.values():
+                slot_results = self._run_check_and_increment([counters[index] for index in indexes])
+                for index, result in zip(indexes, slot_results):
+                    results[index] = result
+        else:
+            results = self._run_check_and_increment(counters)
+        return self._remember_denials(counters, results)
+
+    def _run_check_and_increment(self, counters: Sequence[tuple]) -> List[list]:
+        """Run the check-and-increment script once over counters sharing a hash slot."""
+        keys, args = check_and_increment_arguments(counters)
+        return parse_check_and_increment(
+            self._execute("check_and_increment", self.check_and_increment_script, keys=keys, args=args)
+        )
+
+    def check_and_increment_leased(
+        self, key: str, limit: int, ttl: int, block_size: int, limit_field: str = ""
+    ) -> list:
+        """
+        Count a request against a fixed window counter. Quota leases are not used by the
+        sync client; the counter is charged directly.
+        """
+        return self.check_and_increment(key, limit, ttl, limit_field=limit_field)
+
+    def check_and_increment_deferred(self, key: str, limit: int, ttl: int, cost: int = 1) -> list:
+        """
+        Count a request against a soft-limited fixed window counter. Increments are not
+        deferred by the sync client; the counter is charged directly.
+        """
+        return self.check_and_increment(key, limit, ttl, cost=cost)
+
+    def increment(self, key: str, amount: int, ttl: int) -> int:
+        """
+        Add `amount` to a fixed window counter without checking any limit.
+
+        :return: The count after the increment.
+        """
+        return int(self._execute("increment", self.increment_script, keys=[key], args=[amount, ttl]))
+
+    def increment_many(self, increments: Sequence[tuple]) -> List[int]:
+        """
+        Run the increment script for every (key, amount, ttl) in one pipeline; on a Redis
+        Cluster, one call per counter.
+        """
+        if not increments:
+            return []
+        if self.cluster:
+            return [self.increment(key, amount, ttl) for key, amount, ttl in increments]
+        with self.client.pipeline(transaction=False) as pipe:
+            for key, amount, ttl in increments:
+                self.increment_script(keys=[key], args=[amount, ttl], client=pipe)
+            return [int(count) for count in self._execute("increment_many", pipe.execute)]
+
+    def get_many(self, keys: Sequence[str]) -> List[int]:
+        """
+        Read counters with one MGET; on a Redis Cluster, with one GET per key.
+        """
+        if not keys:
+            return []
+        if self.cluster:
+            values = [self._execute("get", self.client.get, key) for key in keys]
+        else:
+            values = self._execute("mget", self.client.mget, keys)
+        return [int(value) if value and value.isdigit() else 0 for value in values]
+
+    def ttl(self, key: str) -> int:
+        return int(self._execute("ttl", self.client.ttl, key))
+
+    def reset(self, key: str) -> int:
+        """
+        Delete `key` and its derived keys, found with SCAN, with a single DEL.
+        """
+        derived_keys = list(self.client.scan_iter(match=f"{key}:*"))
+        return int(self._execute("delete", self.client.delete, key, *derived_keys))
+
+    def increment_request_count(
+        self,
+        user_id: str,
+        org_id: Optional[str],
+        rule_id: str,
+        expiration: Optional[int] = None,
+        amount: int = 1,
+        reset_period: ResetPeriod = ResetPeriod.MONTHLY,
+        timezone: Optional[str] = None,
+    ) -> list:
+        """
+        Add `amount` to a rule's fixed window counter for the current window, see
+        `CounterStore.increment_request_count`.
+        """
+        key, seconds = self.window_key(user_id, org_id, rule_id, reset_period, timezone)
+        count = self.increment(key, amount, expiration or seconds)
+        return [True, {"key": key, "count": count}, "SUCCESS"]
+
+    def get_request_count(
+        self,
+        user_id: str,
+        org_id: Optional[str],
+        rule_id: str,
+        reset_period: ResetPeriod = ResetPeriod.MONTHLY,
+        timezone: Optional[str] = None,
+    ) -> int:
+        """
+        Read a rule's fixed window counter for the current window, see `window_key`.
+        """
+        return self.get_many([self.window_key(user_id, org_id, rule_id, reset_period, timezone)[0]])[0]
+
+    def reset_request_count(self, user_id: str, org_id: Optional[str], rule_id: str):
+        """
+        Delete the counter for a rule along with every counter derived from its key.
+        """
+        key = self.build_key(user_id, org_id, rule_id)
+        self.reset(key)
+        self.denial_cache.invalidate(key)
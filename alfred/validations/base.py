@@ -1,62 +1,470 @@
+import math
+import time
 from abc import ABC, abstractmethod
-from alfred.redis_manager import RedisManager
+from typing import NamedTuple, Optional, Tuple, Union
+
+from alfred.circuit_breaker import RedisUnavailableError
+from alfred.config.settings import loaded_config
+from alfred.constants import FailurePolicy, LimitUnit, LimiterAlgorithm, ResetPeriod
+from alfred.counter_store import CounterStore
+
+
+class Budget(NamedTuple):
+    """
+    An additional limit of a rule, counted in its own counter, e.g. tokens per day next to
+    the rule's requests per minute.
+    """
+    name: str
+    limit: int
+    reset_period: ResetPeriod
+    algorithm: LimiterAlgorithm
+    unit: LimitUnit = LimitUnit.COST
+
+
+class CounterCheck(NamedTuple):
+    """
+    A usage counter that must be checked and incremented before a request is allowed.
+
+    `cost` is the number of units the request consumes. `budgets` are further counter
+    checks of the same rule, charged atomically with this one: the request is counted
+    against all of them or none.
+    """
+    key: str
+    limit: int
+    expiration: int
+    limit_reached_message: str
+    algorithm: LimiterAlgorithm = LimiterAlgorithm.FIXED_WINDOW
+    lease_size: int = 0
+    failure_policy: FailurePolicy = FailurePolicy.FAIL_OPEN
+    limit_field: str = ""
+    deferred: bool = False
+    cost: int = 1
+    budget: str = ""
+    budgets: Tuple["CounterCheck", ...] = ()
+
+    def counters(self) -> Tuple["CounterCheck", ...]:
+        """
+        Return this check followed by its budgets.
+        """
+        return (self,) + self.budgets
+
+    def store_counters(self) -> list:
+        """
+        Return the (key, limit, ttl, algorithm, limit_field, cost) counters to pass to
+        `CounterStore.check_and_increment_many`, see `counters`.
+        """
+        return [
+            (each.key, each.limit, each.expiration, each.algorithm, each.limit_field, each.cost)
+            for each in self.counters()
+        ]
 
 
 class BaseValidation(ABC):
     """
     Abstract base class for validations.
-    All validation classes must inherit from this class and implement the `validate` method.
+    All validation classes must inherit from this class and implement the `check` method,
+    which performs the in-memory part of the validation. `validate` then applies any
+    counter the check asks for.
+
+    Validators are compiled once from their rule JSON and never mutated afterwards;
+    per-request data is passed to `check`/`validate` as a context dict, so a single
+    instance can be shared by concurrent coroutines, or by threads calling `validate_sync`
+    when the counter store is a SyncRedisManager.
     """
-    def __init__(self, redis_manager: RedisManager):
+    __slots__ = ("redis_manager", "rule_id")
+    success_message = "SUCCESS"
+    unavailable_message = "RATE_LIMIT_UNAVAILABLE"
+
+    def __init__(self, redis_manager: CounterStore, rule_id):
         """
         Initialize the base validation class.
 
-        :param redis_manager: Instance of RedisManager for Redis operations.
+        :param redis_manager: Counter store holding usage counters, e.g. a RedisManager.
+        :param rule_id: Unique identifier for the rule.
         """
         self.redis_manager = redis_manager
-        self.success_message = "SUCCESS"
+        self.rule_id = rule_id
 
     @abstractmethod
-    def validate(self, *args, **kwargs):
+    def check(self, context: dict) -> Union[list, CounterCheck]:
         """
         Abstract method to be implemented by subclasses for specific validation logic.
+        Must not perform any I/O.
 
-        :param args: Positional arguments for validation.
-        :param kwargs: Keyword arguments for validation.
-        :raises ValidationError: If validation fails.
+        :param context: Per-request data such as `user_id`, `org_id`, `endpoint` and `model_used`.
+        :return: A final [allowed, details, message] verdict, or a CounterCheck when the
+            verdict depends on a usage counter.
+        :raises ValueError: If required request data is missing.
         """
         pass
 
-    async def get_usage_count(self, user_id: str, rule_id: str) -> int:
+    async def validate(self, context: dict) -> list:
+        """
+        Run the validation, checking and incrementing the usage counter if one applies.
+
+        :param context: Per-request data, see `check`.
+        :return: [allowed, details, message].
+        """
+        metrics = self.redis_manager.metrics
+        if metrics is None:
+            outcome = self.check(context)
+            if isinstance(outcome, CounterCheck):
+                return await self.apply_counter_check(outcome)
+            return outcome
+
+        rule_class_name = type(self).__name__
+        start = time.perf_counter()
+        outcome = self.check(context)
+        checked = time.perf_counter()
+        metrics.observe_stage("check", rule_class_name, checked - start)
+        if isinstance(outcome, CounterCheck):
+            outcome = await self.apply_counter_check(outcome)
+            metrics.observe_stage("counter", rule_class_name, time.perf_counter() - checked)
+        metrics.count_decision(rule_class_name, outcome[0], outcome[2])
+        return outcome
+
+    def validate_sync(self, context: dict) -> list:
+        """
+        Run the validation without an event loop, for a counter store with a synchronous
+        API such as SyncRedisManager. See `validate`.
+
+        :param context: Per-request data, see `check`.
+        :return: [allowed, details, message].
+        """
+        metrics = self.redis_manager.metrics
+        if metrics is None:
+            outcome = self.check(context)
+            if isinstance(outcome, CounterCheck):
+                return self.apply_counter_check_sync(outcome)
+            return outcome
+
+        rule_class_name = type(self).__name__
+        start = time.perf_counter()
+        outcome = self.check(context)
+        checked = time.perf_counter()
+        metrics.observe_stage("check", rule_class_name, checked - start)
+        if isinstance(outcome, CounterCheck):
+            outcome = self.apply_counter_check_sync(outcome)
+            metrics.observe_stage("counter", rule_class_name, time.perf_counter() - checked)
+        metrics.count_decision(rule_class_name, outcome[0], outcome[2])
+        return outcome
+
+    def apply_counter_check_sync(self, counter_check: CounterCheck) -> list:
+        """
+        Atomically check and increment a counter and its budgets through a synchronous
+        counter store, applying the failure policy if Redis is unavailable. Quota leases
+        and deferral are not used; the counters are charged directly.
+
+        :param counter_check: The counter to charge.
+        :return: [allowed, details, message].
+        :raises ValueError: If the counter store is asynchronous.
+        """
+        self._require_store(synchronous=True)
+        denial_cache = self.redis_manager.denial_cache
+        for each in counter_check.counters():
+            cached = denial_cache.get(each.key, each.limit, each.cost)
+            if cached is not None:
+                return self.counter_verdict(each, False, cached[1])
+        try:
+            results = self.redis_manager.check_and_increment_many(counter_check.store_counters())
+        except RedisUnavailableError:
+            return self.degraded_verdict(counter_check)
+        return self.counters_verdict(counter_check, results)
+
+    async def apply_counter_check(self, counter_check: CounterCheck) -> list:
+        """
+        Atomically check and increment the counter described by `counter_check`, applying
+        its failure policy if Redis is unavailable.
+
+        :param counter_check: The counter to charge.
+        :return: [allowed, details, message].
+        :raises ValueError: If the counter store is synchronous.
+        """
+        self._require_store(synchronous=False)
+        try:
+            if counter_check.budgets:
+                return await self.apply_budgets(counter_check)
+            if counter_check.deferred:
+                allowed, count, _ = await self.redis_manager.check_and_increment_deferred(
+                    counter_check.key, counter_check.limit, counter_check.expiration, counter_check.cost
+                )
+            elif counter_check.lease_size > 1:
+                allowed, count, _ = await self.redis_manager.check_and_increment_leased(
+                    counter_check.key,
+                    counter_check.limit,
+                    counter_check.expiration,
+                    counter_check.lease_size,
+                    counter_check.limit_field,
+                )
+            else:
+                allowed, count, _ = await self.redis_manager.check_and_increment(
+                    counter_check.key,
+                    counter_check.limit,
+                    counter_check.expiration,
+                    counter_check.algorithm,
+                    counter_check.limit_field,
+                    counter_check.cost,
+                )
+        except RedisUnavailableError:
+            return self.degraded_verdict(counter_check)
+        return self.counter_verdict(counter_check, allowed, count)
+
+    async def apply_budgets(self, counter_check: CounterCheck) -> list:
+        """
+        Check and increment a counter and its budgets in a single atomic call.
+
+        :param counter_check: The counter to charge, with its budgets.
+        :return: [allowed, details, message].
+        """
+        denial_cache = self.redis_manager.denial_cache
+        for each in counter_check.counters():
+            cached = denial_cache.get(each.key, each.limit, each.cost)
+            if cached is not None:
+                return self.counter_verdict(each, False, cached[1])
+        results = await self.redis_manager.check_and_increment_many(counter_check.store_counters())
+        return self.counters_verdict(counter_check, results)
+
+    def degraded_verdict(self, counter_check: CounterCheck) -> list:
+        """
+        Build the verdict for a counter that could not be charged because Redis is unavailable.
+
+        `fail_open` allows the request, `fail_closed` denies it with `unavailable_message`,
+        and `local` enforces the limit on an approximate in-process counter. Allowed
+        verdicts are marked `"degraded": True`.
+
+        :param counter_check: The counter that could not be charged.
+        :return: [allowed, details, message].
+        """
+        if counter_check.failure_policy == FailurePolicy.FAIL_CLOSED:
+            return [False, {"degraded": True}, self.unavailable_message]
+        if counter_check.failure_policy == FailurePolicy.LOCAL:
+            results = [
+                self.redis_manager.check_and_increment_local(
+                    each.key, each.limit, each.expiration, each.algorithm, each.cost
+                )
+                for each in counter_check.counters()
+            ]
+            verdict = self.counters_verdict(counter_check, results)
+        else:
+            verdict = [True, {"key": counter_check.key}, self.success_message]
+        verdict[1]["degraded"] = True
+        return verdict
+
+    def counter_verdict(self, counter_check: CounterCheck, allowed: bool, count: int) -> list:
         """
-        Retrieve the usage count for a specific user and rule from Redis.
+        Build the verdict for a counter check result.
+
+        :param counter_check: The counter that was charged.
+        :param allowed: Whether the counter was below its limit.
+        :param count: The counter value after the check.
+        :return: [allowed, details, message].
+        """
+        if not allowed:
+            details = {"budget": counter_check.budget} if counter_check.budget else {}
+            return [False, details, counter_check.limit_reached_message]
+        return [True, {"key": counter_check.key, "count": count}, self.success_message]
+
+    def counters_verdict(self, counter_check: CounterCheck, results) -> list:
+        """
+        Build the verdict for the results of a counter check and its budgets. The first
+        denied counter decides a denial; allowed verdicts report each budget's count.
+
+        :param counter_check: The counter that was charged, with its budgets.
+        :param results: [allowed, count, seconds] for each of `counter_check.counters()`.
+        :return: [allowed, details, message].
+        """
+        for each, (allowed, count, _) in zip(counter_check.counters(), results):
+            if not allowed:
+                return self.counter_verdict(each, False, count)
+        verdict = self.counter_verdict(counter_check, True, results[0][1])
+        if counter_check.budgets:
+            verdict[1]["budgets"] = {
+                budget.budget: count for budget, (_, count, _) in zip(counter_check.budgets, results[1:])
+            }
+        return verdict
+
+    def _require_store(self, synchronous: bool):
+        """
+        :raises ValueError: If the counter store's API is not the one the caller uses, e.g.
+            `validate` on a validator compiled for a SyncRedisManager.
+        """
+        if self.redis_manager.synchronous != synchronous:
+            if synchronous:
+                raise ValueError("The counter store is asynchronous; use validate and the async usage helpers.")
+            raise ValueError("The counter store is synchronous; use validate_sync and the *_sync usage helpers.")
+
+    async def get_usage_count(self, user_id: str, org_id: Optional[str], rule_id: str) -> int:
+        """
+        Retrieve the usage count for a specific user or org and rule.
 
         :param user_id: Unique identifier for the user.
+        :param org_id: Unique identifier for the org, if the counter is shared by an org.
         :param rule_id: Unique identifier for the rule.
         :return: Current usage count.
         """
-        return await self.redis_manager.get_request_count(user_id, rule_id)
+        self._require_store(synchronous=False)
+        return await self.redis_manager.get_request_count(user_id, org_id, rule_id)
 
-    async def increment_usage(self, user_id: str, rule_id: str) -> int:
+    def get_usage_count_sync(self, user_id: str, org_id: Optional[str], rule_id: str) -> int:
+        """
+        Retrieve the usage count through a synchronous counter store, see `get_usage_count`.
         """
-        Increment the usage count for a specific user and rule in Redis.
+        self._require_store(synchronous=True)
+        return self.redis_manager.get_request_count(user_id, org_id, rule_id)
+
+    async def increment_usage(self, user_id: str, org_id: Optional[str], rule_id: str, amount: int = 1) -> int:
+        """
+        Increment the usage count for a specific user or org and rule, without checking any limit.
 
         :param user_id: Unique identifier for the user.
+        :param org_id: Unique identifier for the org, if the counter is shared by an org.
         :param rule_id: Unique identifier for the rule.
+        :param amount: Units to add.
         :return: Updated usage count.
         """
-        return await self.redis_manager.increment_request_count(user_id, rule_id)
+        self._require_store(synchronous=False)
+        return (await self.redis_manager.increment_request_count(user_id, org_id, rule_id, amount=amount))[1]["count"]
+
+    def increment_usage_sync(self, user_id: str, org_id: Optional[str], rule_id: str, amount: int = 1) -> int:
+        """
+        Increment the usage count through a synchronous counter store, see `increment_usage`.
+        """
+        self._require_store(synchronous=True)
+        return self.redis_manager.increment_request_count(user_id, org_id, rule_id, amount=amount)[1]["count"]
 
-    async def reset_usage(self, user_id: str, rule_id: str):
+    async def reset_usage(self, user_id: str, org_id: Optional[str], rule_id: str):
         """
-        Reset the usage count for a specific user and rule in Redis.
+        Reset the usage count for a specific user or org and rule, including every counter
+        derived from it.
 
         :param user_id: Unique identifier for the user.
+        :param org_id: Unique identifier for the org, if the counter is shared by an org.
         :param rule_id: Unique identifier for the rule.
         """
-        await self.redis_manager.reset_request_count(user_id, rule_id)
+        self._require_store(synchronous=False)
+        await self.redis_manager.reset_request_count(user_id, org_id, rule_id)
+
+    def reset_usage_sync(self, user_id: str, org_id: Optional[str], rule_id: str):
+        """
+        Reset the usage count through a synchronous counter store, see `reset_usage`.
+        """
+        self._require_store(synchronous=True)
+        self.redis_manager.reset_request_count(user_id, org_id, rule_id)
+
+    @staticmethod
+    def _extract_reset_period(
+        condition_data, default: ResetPeriod = ResetPeriod.MONTHLY, field: str = "reset_period"
+    ) -> ResetPeriod:
+        """Extract and return the reset period from condition data, falling back to `default`."""
+        try:
+            return ResetPeriod(condition_data.get(field) or default)
+        except ValueError:
+            return default
+
+    @staticmethod
+    def _extract_limiter_algorithm(condition_data) -> LimiterAlgorithm:
+        """Extract and return the limiter algorithm from condition data, defaulting to fixed windows."""
+        try:
+            return LimiterAlgorithm(condition_data.get("limiter") or LimiterAlgorithm.FIXED_WINDOW)
+        except ValueError:
+            return LimiterAlgorithm.FIXED_WINDOW
+
+    @staticmethod
+    def _extract_failure_policy(condition_data) -> FailurePolicy:
+        """
+        Extract and return what to do when Redis is unavailable, defaulting to the
+        configured policy.
+        """
+        try:
+            return FailurePolicy(condition_data.get("failure_policy") or loaded_config.FAILURE_POLICY)
+        except ValueError:
+            return FailurePolicy.FAIL_OPEN
+
+    @staticmethod
+    def _extract_deferred(condition_data, algorithm: LimiterAlgorithm) -> bool:
+        """
+        Extract and return whether increments are deferred for a soft limit. Deferral is
+        opt-in and only applies to fixed windows.
+        """
+        return algorithm == LimiterAlgorithm.FIXED_WINDOW and bool(condition_data.get("deferred_increment", False))
+
+    @staticmethod
+    def _extract_limit_unit(condition_data, field: str = "limit_unit") -> LimitUnit:
+        """
+        Extract and return what a limit counts: requests (weighted by model) or the
+        request's `cost`, e.g. tokens. Defaults to requests.
+        """
+        try:
+            return LimitUnit(condition_data.get(field) or LimitUnit.REQUESTS)
+        except ValueError:
+            return LimitUnit.REQUESTS
+
+    @staticmethod
+    def _extract_model_weights(condition_data) -> dict:
+        """
+        Extract and return the weight of each model from condition data. Unlisted models
+        weigh 1.
+
+        :raises ValueError: If a weight is negative.
+        """
+        weights = {model: float(weight) for model, weight in condition_data.get("model_weights", {}).items()}
+        negative = [model for model, weight in weights.items() if weight < 0]
+        if negative:
+            raise ValueError(f"Model weights must not be negative: {', '.join(map(str, negative))}")
+        return weights
+
+    @classmethod
+    def _extract_budgets(cls, condition_data, algorithm: LimiterAlgorithm) -> Tuple[Budget, ...]:
+        """
+        Extract and return the additional budgets of a rule from the `budgets` list of the
+        condition data, e.g. `{"name": "tokens", "limit": 100000, "reset_period": "daily"}`.
+        Budgets count the request's cost unless their `unit` is `requests`, and use the
+        rule's limiter algorithm unless they set `limiter`.
+
+        :raises ValueError: If a budget has no name or two budgets share one.
+        """
+        budgets = []
+        for budget in condition_data.get("budgets", []):
+            name = budget.get("name")
+            if not name or any(each.name == name for each in budgets):
+                raise ValueError(f"Every budget needs a unique 'name', got '{name}'.")
+            budgets.append(
+                Budget(
+                    name=str(name),
+                    limit=int(budget.get("limit", 0)),
+                    reset_period=cls._extract_reset_period(budget, ResetPeriod.DAILY),
+                    algorithm=cls._extract_limiter_algorithm({"limiter": budget.get("limiter") or algorithm}),
+                    unit=cls._extract_limit_unit({"unit": budget.get("unit") or LimitUnit.COST}, field="unit"),
+                )
+            )
+        return tuple(budgets)
+
+    @staticmethod
+    def _request_cost(context: dict, unit: LimitUnit, weight: float) -> int:
+        """
+        Return the units a request consumes: its weight for request limits, else its
+        `cost` times its weight, rounded up.
+
+        :raises ValueError: If a cost limit applies and the context has no valid `cost`.
+        """
+        if unit == LimitUnit.REQUESTS:
+            return math.ceil(weight)
+        cost = context.get("cost")
+        if isinstance(cost, bool) or not isinstance(cost, (int, float)) or cost < 0:
+            raise ValueError("Cost-based limits require a non-negative numeric 'cost' in kwargs.")
+        return math.ceil(cost * weight)
+
+    @staticmethod
+    def _extract_lease_size(condition_data, algorithm: LimiterAlgorithm) -> int:
+        """
+        Extract and return the quota lease block size from condition data. Leasing is opt-in
+        and only applies to fixed windows; 0 disables it.
+        """
+        if algorithm != LimiterAlgorithm.FIXED_WINDOW:
+            return 0
+        return int(condition_data.get("lease_size", 0))
 
-    def _extract_condition_endpoints(self, condition_data):
+    @staticmethod
+    def _extract_condition_endpoints(condition_data):
         """Extract and return the allowed API endpoints from condition data."""
-        condition_endpoints = condition_data.get("condition_endpoints", [])
-        return condition_endpoints
\ No newline at end of file
+        return frozenset(condition_data.get("condition_endpoints", []))
\ No newline at end of file
@@ -0,0 +1,206 @@
+from abc import ABC
+from typing import Optional, Tuple
+
+from alfred.constants import RESET_PERIOD_SECONDS, FailurePolicy, LimitUnit, LimiterAlgorithm, ResetPeriod
+from alfred.counter_store import CounterStore
+from alfred.validations.base import BaseValidation, Budget, CounterCheck
+from alfred.window_calendar import WindowCalendar, get_window_calendar
+
+
+class BaseCounterValidation(BaseValidation, ABC):
+    """
+    Base class for validations that charge a usage counter.
+
+    Fixed window counters are keyed by the calendar window they belong to, computed in the
+    rule's `timezone`, else the request context's `timezone` (e.g. the org's), else the
+    configured default. Sliding window and token bucket counters use the reset period as a
+    rolling window length instead.
+
+    `failure_policy` decides the verdict when the counter cannot be charged because Redis
+    is unavailable, see `BaseValidation.degraded_verdict`. With `deferred`, the limit is soft:
+    increments are buffered in process and written in batches, see `DeferredCounterBuffer`.
+
+    A request costs 1 unit unless the rule weighs models (`model_weights`) or counts the
+    request's `cost` (`limit_unit`), e.g. tokens. `budgets` are further limits of the rule,
+    such as tokens per day next to requests per minute, kept in their own counters under
+    `<rule key>:budget:<name>` and charged atomically with the main counter. Quota leases
+    only serve unit-cost requests, and neither leases nor deferral apply to rules with budgets.
+    """
+    __slots__ = (
+        "limit",
+        "reset_period",
+        "algorithm",
+        "lease_size",
+        "calendar",
+        "failure_policy",
+        "deferred",
+        "limit_unit",
+        "model_weights",
+        "budgets",
+    )
+    limit_reached_message = "REQUEST_LIMIT_REACHED"
+
+    def __init__(
+        self,
+        redis_manager: CounterStore,
+        rule_id,
+        limit: Optional[int],
+        reset_period: ResetPeriod = ResetPeriod.MONTHLY,
+        algorithm: LimiterAlgorithm = LimiterAlgorithm.FIXED_WINDOW,
+        lease_size: int = 0,
+        timezone: Optional[str] = None,
+        failure_policy: FailurePolicy = FailurePolicy.FAIL_OPEN,
+        deferred: bool = False,
+        limit_unit: LimitUnit = LimitUnit.REQUESTS,
+        model_weights: Optional[dict] = None,
+        budgets: Tuple[Budget, ...] = (),
+    ):
+        super().__init__(redis_manager, rule_id)
+        self.limit = limit
+        self.reset_period = reset_period
+        self.algorithm = algorithm
+        self.lease_size = lease_size
+        self.calendar = get_window_calendar(timezone) if timezone else None
+        self.failure_policy = failure_policy
+        self.deferred = deferred and not budgets
+        self.limit_unit = limit_unit
+        self.model_weights = model_weights or {}
+        self.budgets = budgets
+
+    def window_calendar(self, context: dict) -> WindowCalendar:
+        """
+        Return the calendar fixed windows are computed in for this request.
+        """
+        if self.calendar is not None:
+            return self.calendar
+        timezone = context.get("timezone")
+        return get_window_calendar(timezone) if timezone else get_window_calendar()
+
+    def counter_check(
+        self,
+        context: dict,
+        rule_id=None,
+        limit: Optional[int] = None,
+        reset_period: Optional[ResetPeriod] = None,
+        priced: bool = True,
+    ) -> CounterCheck:
+        """
+        Describe the usage counter charged for a request against this rule.
+        `rule_id`, `limit` and `reset_period` override the instance defaults when given.
+        With `priced=False` the request's cost and the budgets are skipped, e.g. to locate
+        the counter for a usage read.
+        """
+        reset_period = reset_period or self.reset_period
+        rule_id = rule_id or self.rule_id
+        key, expiration = self._counter_key(context, rule_id, self.algorithm, reset_period)
+        cost, budgets = 1, ()
+        if priced:
+            weight = self.model_weights.get(context.get("model_used"), 1) if self.model_weights else 1
+            cost = self._request_cost(context, self.limit_unit, weight)
+            budgets = tuple(self._budget_check(context, budget, weight) for budget in self.budgets)
+        return CounterCheck(
+            key=key,
+            limit=self.limit if limit is None else limit,
+            expiration=expiration,
+            limit_reached_message=self.limit_reached_message,
+            algorithm=self.algorithm,
+            lease_size=self.lease_size if cost == 1 and not budgets else 0,
+            failure_policy=self.failure_policy,
+            limit_field=str(rule_id),
+            deferred=self.deferred,
+            cost=cost,
+            budgets=budgets,
+        )
+
+    def _counter_key(
+        self, context: dict, rule_id, algorithm: LimiterAlgorithm, reset_period: ResetPeriod, suffix: str = ""
+    ) -> Tuple[str, int]:
+        """Return the key and expiration of a counter of `rule_id` for the current window."""
+        key = self.redis_manager.build_key(context.get("user_id"), context.get("org_id"), rule_id) + suffix
+        if algorithm == LimiterAlgorithm.FIXED_WINDOW:
+            window_id, expiration = self.window_calendar(context).current_window(reset_period)
+            return f"{key}:{window_id}", expiration
+        return f"{key}:{algorithm.value}", RESET_PERIOD_SECONDS[reset_period]
+
+    def _budget_check(self, context: dict, budget: Budget, weight: float) -> CounterCheck:
+        """Describe the counter of one of the rule's budgets, shared by every tier of the rule."""
+        key, expiration = self._counter_key(
+            context, self.rule_id, budget.algorithm, budget.reset_period, suffix=f":budget:{budget.name}"
+        )
+        return CounterCheck(
+            key=key,
+            limit=budget.limit,
+            expiration=expiration,
+            limit_reached_message=self.limit_reached_message,
+            algorithm=budget.algorithm,
+            failure_policy=self.failure_policy,
+            limit_field=f"{self.rule_id}:{budget.name}",
+            cost=self._request_cost(context, budget.unit, weight),
+            budget=budget.name,
+        )
+
+    def usage_counter_check(self, user_id: str, org_id: Optional[str] = None, rule_id=None) -> CounterCheck:
+        """
+        Describe the counter of this rule for a user or org in the current window.
+        `rule_id` overrides the rule's own id.
+        """
+        return self.counter_check({"user_id": user_id, "org_id": org_id}, rule_id, priced=False)
+
+    async def get_usage_count(self, user_id: str, org_id: Optional[str] = None, rule_id=None) -> int:
+        """
+        Retrieve the usage count of this rule's counter for the current window, see
+        `usage_counter_check`. Sliding window and token bucket counters are not plain counts
+        and read as 0.
+        """
+        self._require_store(synchronous=False)
+        counter_check = self.usage_counter_check(user_id, org_id, rule_id)
+        return (await self.redis_manager.get_many([counter_check.key]))[0]
+
+    def get_usage_count_sync(self, user_id: str, org_id: Optional[str] = None, rule_id=None) -> int:
+        """
+        Retrieve the usage count through a synchronous counter store, see `get_usage_count`.
+        """
+        self._require_store(synchronous=True)
+        counter_check = self.usage_counter_check(user_id, org_id, rule_id)
+        return self.redis_manager.get_many([counter_check.key])[0]
+
+    async def increment_usage(self, user_id: str, org_id: Optional[str] = None, rule_id=None, amount: int = 1) -> int:
+        """
+        Add `amount` units to this rule's fixed window counter without checking the limit.
+
+        :raises ValueError: If the rule does not use fixed windows.
+        """
+        self._require_store(synchronous=False)
+        counter_check = self._fixed_window_usage_check(user_id, org_id, rule_id)
+        return await self.redis_manager.increment(counter_check.key, amount, counter_check.expiration)
+
+    def increment_usage_sync(self, user_id: str, org_id: Optional[str] = None, rule_id=None, amount: int = 1) -> int:
+        """
+        Add `amount` units through a synchronous counter store, see `increment_usage`.
+        """
+        self._require_store(synchronous=True)
+        counter_check = self._fixed_window_usage_check(user_id, org_id, rule_id)
+        return self.redis_manager.increment(counter_check.key, amount, counter_check.expiration)
+
+    def _fixed_window_usage_check(self, user_id: str, org_id: Optional[str], rule_id) -> CounterCheck:
+        if self.algorithm != LimiterAlgorithm.FIXED_WINDOW:
+            raise ValueError("Only fixed window counters can be incremented without a limit check.")
+        return self.usage_counter_check(user_id, org_id, rule_id)
+
+    async def reset_usage(self, user_id: str, org_id: Optional[str] = None, rule_id=None):
+        """
+        Reset every counter of this rule for a user or org, across windows and algorithms.
+        """
+        await super().reset_usage(user_id, org_id, rule_id or self.rule_id)
+
+    def reset_usage_sync(self, user_id: str, org_id: Optional[str] = None, rule_id=None):
+        """
+        Reset every counter of this rule through a synchronous counter store, see `reset_usage`.
+        """
+        super().reset_usage_sync(user_id, org_id, rule_id or self.rule_id)
+
+    async def validate_request(self, user_id: str, org_id: Optional[str], rule_id: str) -> list:
+        """
+        Validate if the request is within the allowed limit, counting it if so.
+        """
+        return await self.apply_counter_check(self.counter_check({"user_id": user_id, "org_id": org_id}, rule_id))
@@ -1,31 +1,39 @@
-import json
-from alfred.redis_manager import RedisManager
+from alfred.counter_store import CounterStore
 from alfred.validations.base_feature_validation import BaseFeatureValidation
+from alfred.validator_registry import register_validator
 
 
+@register_validator
 class FreePlanRestrictedEndpoints(BaseFeatureValidation):
-    def __init__(self, redis_manager: RedisManager, rule_id, condition_data, **kwargs):
+    __slots__ = ("condition_endpoints",)
+    error_message = "FEATURE_RESTRICTED"
+
+    def __init__(self, redis_manager: CounterStore, rule_id, condition_data):
+        algorithm = self._extract_limiter_algorithm(condition_data)
         super().__init__(
             redis_manager=redis_manager,
+            rule_id=rule_id,
             limit=self._extract_request_limit(condition_data),
-            expiration_func=self.get_expiration_function(condition_data.get("reset_period"))
+            reset_period=self._extract_reset_period(condition_data),
+            algorithm=algorithm,
+            lease_size=self._extract_lease_size(condition_data, algorithm),
+            timezone=condition_data.get("timezone"),
+            failure_policy=self._extract_failure_policy(condition_data),
+            deferred=self._extract_deferred(condition_data, algorithm),
         )
         self.condition_endpoints = self._extract_condition_endpoints(condition_data)
-        self.rule_id = rule_id
-        self.kwargs = kwargs
-        self.error_message = "FEATURE_RESTRICTED"
 
     @staticmethod
     def _extract_request_limit(condition_data):
         """Extract and return the request limit from condition data."""
         return int(condition_data.get("request_limit", 0))
 
-    async def validate(self) -> list:
+    def check(self, context: dict) -> list:
         """
-        Validate if the request is within the allowed limit for the feature and endpoint.
+        Validate if the request is allowed for the feature and endpoint.
         """
-        self._validate_kwargs(self.kwargs)
-        endpoint = self.kwargs.get("endpoint")
+        self._validate_kwargs(context)
+        endpoint = context.get("endpoint")
         
         if self._is_endpoint_restricted(endpoint):
             return [False, {}, self.error_message]
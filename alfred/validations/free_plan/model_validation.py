@@ -1,20 +1,31 @@
-import json
-from alfred.redis_manager import RedisManager
+from alfred.counter_store import CounterStore
 from alfred.validations.base_model_validation import BaseModelValidation
+from alfred.validator_registry import register_validator
 
 
+@register_validator
 class FreePlanModelValidation(BaseModelValidation):
-    def __init__(self, redis_manager: RedisManager, rule_id, condition_data, **kwargs):
+    __slots__ = ("allowed_models", "condition_endpoints")
+    error_message = "MODEL_NOT_ALLOWED"
+
+    def __init__(self, redis_manager: CounterStore, rule_id, condition_data):
+        algorithm = self._extract_limiter_algorithm(condition_data)
         super().__init__(
             redis_manager=redis_manager,
+            rule_id=rule_id,
             limit=self._extract_request_limit(condition_data),
-            expiration_func=self.get_expiration_function(condition_data.get("reset_period"))
+            reset_period=self._extract_reset_period(condition_data),
+            algorithm=algorithm,
+            lease_size=self._extract_lease_size(condition_data, algorithm),
+            timezone=condition_data.get("timezone"),
+            failure_policy=self._extract_failure_policy(condition_data),
+            deferred=self._extract_deferred(condition_data, algorithm),
+            limit_unit=self._extract_limit_unit(condition_data),
+            model_weights=self._extract_model_weights(condition_data),
+            budgets=self._extract_budgets(condition_data, algorithm),
         )
         self.allowed_models = self._extract_allowed_models(condition_data)
         self.condition_endpoints = self._extract_condition_endpoints(condition_data)
-        self.rule_id = rule_id
-        self.kwargs = kwargs
-        self.error_message = "MODEL_NOT_ALLOWED"
 
     @staticmethod
     def _extract_request_limit(condition_data):
@@ -24,24 +35,21 @@ class FreePlanModelValidation(BaseModelValidation):
     @staticmethod
     def _extract_allowed_models(condition_data):
         """Extract and return the allowed models from condition data."""
-        allowed_models_json = condition_data.get("allowed_models", [])
-        return allowed_models_json
+        return frozenset(condition_data.get("allowed_models", []))
 
-    async def validate(self) -> list:
+    def check(self, context: dict):
         """
-        Validate if the request is within the allowed limit for the model.
+        Validate if the model is allowed, deferring to the request counter if it is.
         """
-        if self.kwargs.get("endpoint") not in self.condition_endpoints:
+        if context.get("endpoint") not in self.condition_endpoints:
             return [True, {}, self.success_message]
         
-        self._validate_kwargs(self.kwargs)
-        model = self.kwargs.get("model_used")
+        self._validate_kwargs(context)
+        model = context.get("model_used")
         if not self._is_model_allowed(model):
             return [False, {}, self.error_message]
         
-        user_id = self.kwargs.get("user_id")
-        org_id = self.kwargs.get("org_id")
-        return await self.validate_request(user_id, org_id, self.rule_id)
+        return self.counter_check(context)
 
     def _is_model_allowed(self, model):
         """Check if the model is in the list of allowed models."""
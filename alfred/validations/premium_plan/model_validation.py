@@ -1,49 +1,103 @@
-import json
+from typing import Optional
 
-from alfred.redis_manager import RedisManager
+from alfred.constants import ModelTier, ResetPeriod
+from alfred.counter_store import CounterStore
+from alfred.validations.base import CounterCheck
 from alfred.validations.base_model_validation import BaseModelValidation
+from alfred.validator_registry import register_validator
 
 
+@register_validator
 class PremiumPlanModelValidation(BaseModelValidation):
-    def __init__(self, redis_manager: RedisManager, rule_id, condition_data, **kwargs):
+    """
+    Limits standard and premium models with separate counters.
+
+    Each tier reads `<tier>_request_limit` and `<tier>_reset_period` from the condition
+    data, falling back to the shared `request_limit` and `reset_period`. Usage is counted
+    under `<rule_id>:<tier>`, so standard traffic never consumes the premium allowance.
+    """
+    __slots__ = ("model_tiers", "tier_limits", "tier_reset_periods", "condition_endpoints")
+    error_message = "MODEL_NOT_ALLOWED"
+
+    def __init__(self, redis_manager: CounterStore, rule_id, condition_data):
+        algorithm = self._extract_limiter_algorithm(condition_data)
         super().__init__(
             redis_manager=redis_manager,
+            rule_id=rule_id,
             limit=None,
-            expiration_func=None
+            algorithm=algorithm,
+            lease_size=self._extract_lease_size(condition_data, algorithm),
+            timezone=condition_data.get("timezone"),
+            failure_policy=self._extract_failure_policy(condition_data),
+            deferred=self._extract_deferred(condition_data, algorithm),
+            limit_unit=self._extract_limit_unit(condition_data),
+            model_weights=self._extract_model_weights(condition_data),
+            budgets=self._extract_budgets(condition_data, algorithm),
         )
-        self.kwargs = kwargs
-        self.rule_id = rule_id
-        self.standard_models = condition_data.get("allowed_standard_models", [])
-        self.premium_models = condition_data.get("allowed_premium_models", [])
-        self.premium_models_limit = int(condition_data.get("request_limit", 0))
-        self.standard_models_limit = int(condition_data.get("request_limit", 0))
-        self.premium_limit_time_period = condition_data.get("reset_period", "daily")
-        self.standard_limit_time_period = condition_data.get("reset_period", "daily")
+        self.model_tiers = self._extract_model_tiers(condition_data)
+        self.tier_limits = {tier: self._extract_tier_limit(condition_data, tier) for tier in ModelTier}
+        self.tier_reset_periods = {tier: self._extract_tier_reset_period(condition_data, tier) for tier in ModelTier}
         self.condition_endpoints = self._extract_condition_endpoints(condition_data)
-        self.error_message = "MODEL_NOT_ALLOWED"
 
-    async def validate(self) -> list:
+    @staticmethod
+    def _extract_model_tiers(condition_data) -> dict:
+        """Map each allowed model to its tier. A model listed in both tiers counts as standard."""
+        model_tiers = dict.fromkeys(condition_data.get("allowed_premium_models", []), ModelTier.PREMIUM)
+        model_tiers.update(dict.fromkeys(condition_data.get("allowed_standard_models", []), ModelTier.STANDARD))
+        return model_tiers
+
+    @staticmethod
+    def _extract_tier_limit(condition_data, tier: ModelTier) -> int:
+        """Extract the request limit for a tier, falling back to the shared request limit."""
+        return int(condition_data.get(f"{tier.value}_request_limit", condition_data.get("request_limit", 0)))
+
+    @classmethod
+    def _extract_tier_reset_period(cls, condition_data, tier: ModelTier) -> ResetPeriod:
+        """Extract the reset period for a tier, falling back to the shared reset period."""
+        default = cls._extract_reset_period(condition_data, ResetPeriod.DAILY)
+        return cls._extract_reset_period(condition_data, default, field=f"{tier.value}_reset_period")
+
+    def check(self, context: dict):
         """
-        Validate if the request is within the allowed limits for standard or premium models.
+        Resolve the standard or premium limit for the model, deferring to that tier's counter.
         """
-        if self.kwargs.get("endpoint") not in self.condition_endpoints:
+        if context.get("endpoint") not in self.condition_endpoints:
             return [True, {}, self.success_message]
 
-        self._validate_kwargs(self.kwargs)
-        model = self.kwargs.get("model_used")
-        user_id = self.kwargs.get("user_id")
-        org_id = self.kwargs.get("org_id")
-        time_period_mapper = {
-            "monthly": self.calculate_month_expiration,
-            "daily": self.calculate_day_expiration
-        }
-        if model in self.standard_models:
-            self.limit = self.standard_models_limit
-            self.expiration_func = time_period_mapper[self.standard_limit_time_period]
-        elif model in self.premium_models:
-            self.limit = self.premium_models_limit
-            self.expiration_func = time_period_mapper[self.premium_limit_time_period]
-        else:
+        self._validate_kwargs(context)
+        tier = self.model_tiers.get(context.get("model_used"))
+        if tier is None:
             return [True, {}, self.success_message]
 
-        return await self.validate_request(user_id, org_id, self.rule_id)
+        return self._tier_counter_check(context, tier)
+
+    def _tier_counter_check(self, context: dict, tier: ModelTier, priced: bool = True) -> CounterCheck:
+        """Describe the counter of one tier, with that tier's limit and reset period."""
+        return self.counter_check(
+            context,
+            f"{self.rule_id}:{tier.value}",
+            limit=self.tier_limits[tier],
+            reset_period=self.tier_reset_periods[tier],
+            priced=priced,
+        )
+
+    @staticmethod
+    def _tier_of(rule_id) -> ModelTier:
+        """Read the tier of a `<rule_id>:<tier>` id; a plain rule id selects the standard tier."""
+        suffix = str(rule_id).rpartition(":")[2] if rule_id else None
+        return next((tier for tier in ModelTier if tier.value == suffix), ModelTier.STANDARD)
+
+    def usage_counter_check(self, user_id: str, org_id: Optional[str] = None, rule_id=None) -> CounterCheck:
+        """
+        Describe a tier's counter for a user or org in the current window. `rule_id` selects
+        the tier as `<rule_id>:<tier>`; a plain rule id selects the standard tier.
+        """
+        return self._tier_counter_check({"user_id": user_id, "org_id": org_id}, self._tier_of(rule_id), priced=False)
+
+    async def validate_request(self, user_id: str, org_id: Optional[str], rule_id: str) -> list:
+        """
+        Validate if the request is within its tier's limit, counting it if so. `rule_id`
+        selects the tier as in `usage_counter_check`.
+        """
+        context = {"user_id": user_id, "org_id": org_id}
+        return await self.apply_counter_check(self._tier_counter_check(context, self._tier_of(rule_id)))
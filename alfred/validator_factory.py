@@ -1,44 +1,105 @@
-import importlib
-import importlib.util
-import os
+import asyncio
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from alfred.circuit_breaker import RedisUnavailableError
+from alfred.counter_store import CounterStore
+from alfred.instrumentation import MetricsSink
 from alfred.redis_manager import RedisManager
+from alfred.sync_redis_manager import SyncRedisManager
+from alfred.validations.base import BaseValidation, CounterCheck
+from alfred.validator_registry import ValidatorRegistry, validator_registry
 
 
 class ValidatorFactory:
     """
-    Factory to initialize RedisManager and dynamically load validator instances
-    based on the 'rule_class_name' field in the rule JSON.
+    Factory to initialize the counter store (a RedisManager by default) and load
+    validator instances based on the 'rule_class_name' field in the rule JSON.
+
+    With `sync=True` the store is a SyncRedisManager and requests are validated with
+    `validate_all_sync`, without an event loop. A sync factory can be shared by the
+    threads of a worker: compiled validators hold no per-request state, and a rule
+    compiled concurrently by two threads is simply compiled twice.
     """
 
-    def __init__(self, redis_url: str):
+    def __init__(
+        self,
+        redis_url: Optional[str],
+        registry: Optional[ValidatorRegistry] = None,
+        metrics: Optional[MetricsSink] = None,
+        counter_store: Optional[CounterStore] = None,
+        sync: bool = False,
+        **redis_options,
+    ):
         """
-        Initialize the ValidatorFactory with a Redis URL.
+        Initialize the ValidatorFactory with a Redis URL or a counter store.
+
+        Args:
+            redis_url (str): URL of the Redis server holding the usage counters. Ignored
+                when `counter_store` is given.
+            registry (ValidatorRegistry, optional): Registry used to resolve 'rule_class_name'.
+                Defaults to the shared registry, which discovers validators on first use.
+            metrics (MetricsSink, optional): Sink receiving stage timings, verdicts and Redis
+                metrics. Instrumentation is skipped entirely when omitted.
+            counter_store (CounterStore, optional): Backend holding the usage counters, e.g.
+                an InMemoryCounterStore, instead of a RedisManager built from `redis_url`.
+            sync (bool): Build a SyncRedisManager from `redis_url`, for `validate_all_sync`.
+            **redis_options: Connection pool options forwarded to RedisManager or
+                SyncRedisManager.
         """
-        self.redis_manager = RedisManager(redis_url)
+        self.metrics = metrics
+        if counter_store is not None:
+            if metrics is not None:
+                counter_store.metrics = metrics
+            self.redis_manager = counter_store
+        elif sync:
+            self.redis_manager = SyncRedisManager(redis_url, metrics=metrics, **redis_options)
+        else:
+            self.redis_manager = RedisManager(redis_url, metrics=metrics, **redis_options)
+        self.registry = registry or validator_registry
+        self._compiled_rules: Dict[object, Tuple[dict, BaseValidation]] = {}
 
-    @staticmethod
-    def _find_class_in_module(module_name, class_name):
+    async def aclose(self):
         """
-        Import a module and return a class by name.
+        Release the counter store's resources, such as the Redis connection pool. Call once
+        on application shutdown.
+        """
+        if self.redis_manager.synchronous:
+            self.redis_manager.close()
+        else:
+            await self.redis_manager.aclose()
 
-        Args:
-            module_name (str): The module to import.
-            class_name (str): The name of the class to find.
+    def close(self):
+        """
+        Release the counter store's resources without an event loop. Call once on shutdown.
 
-        Returns:
-            type: The class object if found.
+        Raises:
+            ValueError: If called from a running event loop with an asynchronous counter
+                store; await `aclose()` instead.
+        """
+        if self.redis_manager.synchronous:
+            self.redis_manager.close()
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            asyncio.run(self.redis_manager.aclose())
+            return
+        raise ValueError("An asynchronous counter store must be closed with 'await aclose()' inside an event loop.")
 
+    def _require_store(self, synchronous: bool):
+        """
         Raises:
-            ValueError: If the class is not found in the module.
+            ValueError: If the counter store's API is not the one the caller uses.
         """
-        module = importlib.import_module(module_name)
-        if hasattr(module, class_name):
-            return getattr(module, class_name)
-        raise ValueError(f"Class '{class_name}' not found in module '{module_name}'.")
+        if self.redis_manager.synchronous != synchronous:
+            if synchronous:
+                raise ValueError("The counter store is asynchronous; use validate_all or validate_compiled.")
+            raise ValueError("The counter store is synchronous; use validate_all_sync or validate_compiled_sync.")
 
     def _get_validator_class(self, rule_class_name):
         """
-        Dynamically find the validator class based on the 'rule_class_name'.
+        Look up the validator class for 'rule_class_name' in the registry.
 
         Args:
             rule_class_name (str): Name of the rule class to load.
@@ -47,38 +108,38 @@ class ValidatorFactory:
             type: The class object corresponding to the rule_class_name.
 
         Raises:
-            ValueError: If the class cannot be found in the specified folders.
+            ValueError: If no validator is registered under that name.
         """
-        validator_folders = [
-            "alfred.validations.free_plan",
-            "alfred.validations.premium_plan",
-        ]
-
-        for folder in validator_folders:
-            module_spec = importlib.util.find_spec(folder)
-            if module_spec and module_spec.origin:
-                folder_path = os.path.dirname(module_spec.origin)
+        return self.registry.get(rule_class_name)
 
-                if os.path.exists(folder_path):
-                    for file in os.listdir(folder_path):
-                        if file.endswith(".py") and file != "__init__.py":
-                            module_name = f"{folder}.{file[:-3]}"
-                            try:
-                                return self._find_class_in_module(module_name, rule_class_name)
-                            except ValueError:
-                                continue
-
-        raise ValueError(f"Validator class '{rule_class_name}' not found in any of the specified folders.")
+    @staticmethod
+    def _same_rule(compiled_json: dict, rule_json: dict) -> bool:
+        """
+        Whether `rule_json` is the rule `compiled_json` was compiled from: the same dict,
+        the same 'version' field when both carry one, or else an equal dict.
+        """
+        if compiled_json is rule_json:
+            return True
+        version = rule_json.get("version")
+        if version is not None and compiled_json.get("version") is not None:
+            return version == compiled_json["version"]
+        return compiled_json == rule_json
 
-    def load_validator(self, rule_json: dict, **kwargs):
+    def load_validator(self, rule_json: dict):
         """
-        Load a validator instance based on the 'rule_class_name' in the rule JSON.
+        Load the compiled validator for the 'rule_class_name' in the rule JSON.
+
+        Validators are compiled once per rule id and then reused until a different rule
+        JSON arrives under that id; they hold no per-request state, so pass request data
+        to `validate(context)`. Rule JSONs are treated as immutable, so a dict changed in
+        place is not recompiled; pass a new dict instead. Rules carrying a 'version' field
+        are compared by version only, otherwise by content.
 
         Args:
             rule_json (dict): Rule JSON containing the 'rule_class_name'.
 
         Returns:
-            BaseValidation: An instance of the specified validator class.
+            BaseValidation: The compiled validator for the rule.
 
         Raises:
             ValueError: If 'rule_class_name' is missing or the class cannot be loaded.
@@ -86,6 +147,221 @@ class ValidatorFactory:
         if "rule_class_name" not in rule_json:
             raise ValueError("The rule JSON must contain a 'rule_class_name' field.")
 
-        rule_class_name = rule_json["rule_class_name"]
-        validator_class = self._get_validator_class(rule_class_name)
-        return validator_class(self.redis_manager, rule_json["id"], rule_json["conditions"], **kwargs)
+        rule_id = rule_json["id"]
+        cached = self._compiled_rules.get(rule_id)
+        if cached is not None and self._same_rule(cached[0], rule_json):
+            return cached[1]
+
+        if self.metrics is None:
+            validator_class = self._get_validator_class(rule_json["rule_class_name"])
+            validator = validator_class(self.redis_manager, rule_id, rule_json["conditions"])
+        else:
+            start = time.perf_counter()
+            validator_class = self._get_validator_class(rule_json["rule_class_name"])
+            looked_up = time.perf_counter()
+            validator = validator_class(self.redis_manager, rule_id, rule_json["conditions"])
+            self.metrics.observe_stage("lookup", validator_class.__name__, looked_up - start)
+            self.metrics.observe_stage("construction", validator_class.__name__, time.perf_counter() - looked_up)
+        self._compiled_rules[rule_id] = (rule_json, validator)
+        return validator
+
+    async def validate_all(self, rules: Iterable[dict], **kwargs) -> list:
+        """
+        Validate a request against several rules with at most one Redis round trip.
+
+        In-memory checks, including the denial cache of exhausted counters, run first and
+        the first denial short-circuits. The counters, including every rule's budgets, are
+        then checked and incremented together in a single atomic script: either every one
+        of them is charged or, if any is at its limit, none is. Each counter is charged by
+        the request's cost, see `CounterCheck`. If Redis is unavailable, each pending
+        counter's rule decides the verdict through its failure policy.
+
+        Counters of rules with quota leases (`lease_size`) or deferred increments
+        (`deferred_increment`) are outside that guarantee. They are charged one by one,
+        and only once every other counter allowed the request, so a request denied
+        elsewhere never consumes them. If one of them denies the request, the counters
+        charged before it keep the charge.
+
+        Args:
+            rules (Iterable[dict]): Rule JSONs, each containing a 'rule_class_name'.
+            **kwargs: Request data passed to every validator.
+
+        Returns:
+            list: [allowed, {"rules": {rule_id: verdict}}, message], where message is
+            the first denial's message or the success message.
+
+        Raises:
+            ValueError: If a rule cannot be loaded or required request data is missing.
+        """
+        return await self.validate_compiled([self.load_validator(rule_json) for rule_json in rules], **kwargs)
+
+    async def validate_compiled(self, validators: Iterable[BaseValidation], **kwargs) -> list:
+        """
+        Validate a request against already compiled validators, e.g. from a RuleSnapshot,
+        without looking up or parsing any rule JSON. See `validate_all`.
+
+        Args:
+            validators (Iterable[BaseValidation]): Validators returned by `load_validator`.
+            **kwargs: Request data passed to every validator.
+
+        Returns:
+            list: [allowed, {"rules": {rule_id: verdict}}, message].
+
+        Raises:
+            ValueError: If required request data is missing, or the counter store is
+                synchronous.
+        """
+        self._require_store(synchronous=False)
+        if self.metrics is None:
+            return await self._validate_all(validators, kwargs)
+
+        validators = list(validators)
+        start = time.perf_counter()
+        result = await self._validate_all(validators, kwargs)
+        self._report(validators, result, time.perf_counter() - start)
+        return result
+
+    def validate_all_sync(self, rules: Iterable[dict], **kwargs) -> list:
+        """
+        Validate a request against several rules without an event loop, through a
+        synchronous counter store such as SyncRedisManager. See `validate_all`; quota
+        leases and deferred increments are not used, so every pending counter is charged
+        in the single atomic script call.
+
+        Args:
+            rules (Iterable[dict]): Rule JSONs, each containing a 'rule_class_name'.
+            **kwargs: Request data passed to every validator.
+
+        Returns:
+            list: [allowed, {"rules": {rule_id: verdict}}, message].
+
+        Raises:
+            ValueError: If a rule cannot be loaded or required request data is missing.
+        """
+        return self.validate_compiled_sync([self.load_validator(rule_json) for rule_json in rules], **kwargs)
+
+    def validate_compiled_sync(self, validators: Iterable[BaseValidation], **kwargs) -> list:
+        """
+        Validate a request against already compiled validators without an event loop.
+        See `validate_all_sync`.
+
+        Args:
+            validators (Iterable[BaseValidation]): Validators returned by `load_validator`.
+            **kwargs: Request data passed to every validator.
+
+        Returns:
+            list: [allowed, {"rules": {rule_id: verdict}}, message].
+
+        Raises:
+            ValueError: If required request data is missing, or the counter store is
+                asynchronous.
+        """
+        self._require_store(synchronous=True)
+        if self.metrics is None:
+            return self._validate_all_sync(validators, kwargs)
+
+        validators = list(validators)
+        start = time.perf_counter()
+        result = self._validate_all_sync(validators, kwargs)
+        self._report(validators, result, time.perf_counter() - start)
+        return result
+
+    def _report(self, validators: List[BaseValidation], result: list, seconds: float):
+        """Report the duration of a validation and each rule's verdict to `metrics`."""
+        self.metrics.observe_stage("validate_all", type(self).__name__, seconds)
+        rule_class_names = {validator.rule_id: type(validator).__name__ for validator in validators}
+        for rule_id, verdict in result[1]["rules"].items():
+            self.metrics.count_decision(rule_class_names[rule_id], verdict[0], verdict[2])
+
+    def _check_all(self, validators: Iterable[BaseValidation], context: dict) -> Tuple[dict, list, Optional[list]]:
+        """
+        Run every validator's in-memory check and look its counters up in the denial cache.
+
+        Returns:
+            tuple: (verdicts by rule id, (validator, CounterCheck) pairs still to charge,
+            the first denial or None). Checking stops at the first denial.
+        """
+        denial_cache = self.redis_manager.denial_cache
+        details = {}
+        pending = []
+        for validator in validators:
+            outcome = validator.check(context)
+            if isinstance(outcome, CounterCheck):
+                for counter in outcome.counters():
+                    cached = denial_cache.get(counter.key, counter.limit, counter.cost)
+                    if cached is not None:
+                        outcome = validator.counter_verdict(counter, False, cached[1])
+                        break
+                else:
+                    pending.append((validator, outcome))
+                    continue
+            details[validator.rule_id] = outcome
+            if not outcome[0]:
+                return details, pending, outcome
+        return details, pending, None
+
+    @staticmethod
+    def _record_batch(details: dict, pending: list, results: Optional[List[list]]):
+        """
+        Store the verdict of each pending counter check from the batch's `results`, or
+        from its failure policy when `results` is None because Redis was unavailable.
+        """
+        offset = 0
+        for validator, counter_check in pending:
+            if results is None:
+                details[validator.rule_id] = validator.degraded_verdict(counter_check)
+                continue
+            count = 1 + len(counter_check.budgets)
+            details[validator.rule_id] = validator.counters_verdict(counter_check, results[offset:offset + count])
+            offset += count
+
+    @staticmethod
+    def _result(details: dict) -> list:
+        """Combine the verdicts of every rule into the final result."""
+        denied = next((verdict for verdict in details.values() if not verdict[0]), None)
+        if denied:
+            return [False, {"rules": details}, denied[2]]
+        return [True, {"rules": details}, "SUCCESS"]
+
+    def _validate_all_sync(self, validators: Iterable[BaseValidation], context: dict) -> list:
+        """
+        Evaluate `validators` against `context`, see `validate_all_sync`.
+        """
+        details, pending, denied = self._check_all(validators, context)
+        if denied is not None:
+            return [False, {"rules": details}, denied[2]]
+        if pending:
+            try:
+                results = self.redis_manager.check_and_increment_many(
+                    [counter for _, counter_check in pending for counter in counter_check.store_counters()]
+                )
+            except RedisUnavailableError:
+                results = None
+            self._record_batch(details, pending, results)
+        return self._result(details)
+
+    async def _validate_all(self, validators: Iterable[BaseValidation], context: dict) -> list:
+        """
+        Evaluate `validators` against `context`, see `validate_all`.
+        """
+        details, pending, denied = self._check_all(validators, context)
+        if denied is not None:
+            return [False, {"rules": details}, denied[2]]
+
+        local = [item for item in pending if item[1].lease_size > 1 or item[1].deferred]
+        pending = [item for item in pending if item[1].lease_size <= 1 and not item[1].deferred]
+        if pending:
+            try:
+                results = await self.redis_manager.check_and_increment_many(
+                    [counter for _, counter_check in pending for counter in counter_check.store_counters()]
+                )
+            except RedisUnavailableError:
+                results = None
+            self._record_batch(details, pending, results)
+
+        if all(verdict[0] for verdict in details.values()):
+            for validator, counter_check in local:
+                details[validator.rule_id] = await validator.apply_counter_check(counter_check)
+                if not details[validator.rule_id][0]:
+                    break
+        return self._result(details)
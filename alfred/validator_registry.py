@@ -0,0 +1,112 @@
+import importlib
+import pkgutil
+from importlib.metadata import entry_points
+from typing import Dict, Iterable, Optional
+
+from alfred.validations.base import BaseValidation
+
+DEFAULT_VALIDATOR_PACKAGES = (
+    "alfred.validations.free_plan",
+    "alfred.validations.premium_plan",
+)
+VALIDATOR_ENTRY_POINT_GROUP = "alfred.validators"
+
+
+class ValidatorRegistry:
+    """
+    Registry mapping a 'rule_class_name' to its validator class.
+
+    Classes are discovered once (on first lookup) from the validator packages and the
+    'alfred.validators' entry point group, or registered explicitly with `register`.
+    A precomputed manifest of `{class_name: "module:ClassName"}` can be supplied to
+    skip package scanning entirely; its modules are only imported when first looked up.
+    """
+
+    def __init__(self, packages: Iterable[str] = DEFAULT_VALIDATOR_PACKAGES, manifest: Optional[Dict[str, str]] = None):
+        """
+        Initialize the registry.
+
+        :param packages: Packages whose modules are scanned for `BaseValidation` subclasses.
+        :param manifest: Optional frozen mapping of class name to "module:ClassName" path.
+        """
+        self.packages = tuple(packages)
+        self._classes: Dict[str, type] = {}
+        self._manifest: Dict[str, str] = dict(manifest or {})
+        self._discovered = manifest is not None
+
+    def register(self, validator_class: type) -> type:
+        """
+        Register a validator class under its class name. Usable as a decorator.
+
+        :param validator_class: A `BaseValidation` subclass.
+        :return: The same class, unchanged.
+        """
+        if not (isinstance(validator_class, type) and issubclass(validator_class, BaseValidation)):
+            raise ValueError(f"'{validator_class!r}' is not a BaseValidation subclass.")
+        self._classes[validator_class.__name__] = validator_class
+        return validator_class
+
+    def discover(self):
+        """
+        Import every module of the configured packages and the entry point group once,
+        registering all concrete `BaseValidation` subclasses found.
+        """
+        for package_name in self.packages:
+            package = importlib.import_module(package_name)
+            for module_info in pkgutil.iter_modules(package.__path__, prefix=f"{package_name}."):
+                self._register_module(importlib.import_module(module_info.name))
+
+        for entry_point in entry_points(group=VALIDATOR_ENTRY_POINT_GROUP):
+            self.register(entry_point.load())
+
+        self._discovered = True
+
+    def _register_module(self, module):
+        """Register the concrete validator classes defined in a module."""
+        for attribute in vars(module).values():
+            if (
+                isinstance(attribute, type)
+                and issubclass(attribute, BaseValidation)
+                and attribute.__module__ == module.__name__
+                and not getattr(attribute, "__abstractmethods__", None)
+            ):
+                self.register(attribute)
+
+    def get(self, rule_class_name: str) -> type:
+        """
+        Return the validator class registered under `rule_class_name`.
+
+        :param rule_class_name: Name of the rule class to load.
+        :return: The validator class.
+        :raises ValueError: If no validator is registered under that name.
+        """
+        validator_class = self._classes.get(rule_class_name)
+        if validator_class is not None:
+            return validator_class
+
+        if rule_class_name in self._manifest:
+            module_name, _, class_name = self._manifest[rule_class_name].partition(":")
+            module = importlib.import_module(module_name)
+            return self.register(getattr(module, class_name))
+
+        if not self._discovered:
+            self.discover()
+            return self.get(rule_class_name)
+
+        raise ValueError(f"Validator class '{rule_class_name}' not found in any of the specified folders.")
+
+    def manifest(self) -> Dict[str, str]:
+        """
+        Build a manifest of every known validator, suitable for `ValidatorRegistry(manifest=...)`.
+
+        :return: Mapping of class name to "module:ClassName" path.
+        """
+        if not self._discovered:
+            self.discover()
+        manifest = dict(self._manifest)
+        manifest.update({name: f"{cls.__module__}:{cls.__qualname__}" for name, cls in self._classes.items()})
+        return manifest
+
+
+validator_registry = ValidatorRegistry()
+register_validator = validator_registry.register
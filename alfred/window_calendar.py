@@ -0,0 +1,87 @@
+import math
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Tuple
+
+import pytz
+
+from alfred.config.settings import loaded_config
+from alfred.constants import ResetPeriod
+
+WINDOW_ID_FORMATS = {
+    ResetPeriod.MINUTELY: "%Y-%m-%dT%H:%M",
+    ResetPeriod.HOURLY: "%Y-%m-%dT%H",
+    ResetPeriod.DAILY: "%Y-%m-%d",
+    ResetPeriod.MONTHLY: "%Y-%m",
+}
+
+
+class WindowCalendar:
+    """
+    Computes calendar window boundaries for each reset period in a fixed timezone.
+
+    The end of the current window is cached per period and only recomputed once it has
+    passed, so the hot path is a clock read and a comparison. Window ids such as
+    `2026-10` (monthly), `2026-10-18` (daily), `2026-10-18T14` (hourly) or
+    `2026-10-18T14:05` (minutely) are embedded in counter keys, so a window's counter is
+    never reused by the next one regardless of TTLs or which region serves the request.
+    """
+
+    def __init__(self, timezone: str = "UTC"):
+        """
+        :param timezone: IANA timezone name in which windows start and end.
+        """
+        self.timezone = pytz.timezone(timezone)
+        self._windows: Dict[ResetPeriod, Tuple[float, str]] = {}
+
+    def current_window(self, reset_period: ResetPeriod) -> Tuple[str, int]:
+        """
+        Return the current window id and the whole seconds remaining until it ends.
+
+        :param reset_period: Length of the calendar window.
+        :return: (window id, seconds until the window ends, at least 1).
+        """
+        now = time.time()
+        window = self._windows.get(reset_period)
+        if window is None or now >= window[0]:
+            window = self._compute_window(reset_period, now)
+            self._windows[reset_period] = window
+        return window[1], max(1, math.ceil(window[0] - now))
+
+    def _compute_window(self, reset_period: ResetPeriod, now: float) -> Tuple[float, str]:
+        """Compute the end timestamp and id of the window containing `now`."""
+        local_now = datetime.fromtimestamp(now, self.timezone).replace(tzinfo=None)
+        if reset_period == ResetPeriod.MINUTELY:
+            start = local_now.replace(second=0, microsecond=0)
+            end = start + timedelta(minutes=1)
+        elif reset_period == ResetPeriod.HOURLY:
+            start = local_now.replace(minute=0, second=0, microsecond=0)
+            end = start + timedelta(hours=1)
+        elif reset_period == ResetPeriod.DAILY:
+            start = local_now.replace(hour=0, minute=0, second=0, microsecond=0)
+            end = start + timedelta(days=1)
+        else:
+            reset_period = ResetPeriod.MONTHLY
+            start = local_now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+            end = (start + timedelta(days=32)).replace(day=1)
+        end_timestamp = self.timezone.localize(end, is_dst=False).timestamp()
+        return end_timestamp, start.strftime(WINDOW_ID_FORMATS[reset_period])
+
+
+_calendars: Dict[str, WindowCalendar] = {}
+
+
+def get_window_calendar(timezone: str = loaded_config.DEFAULT_TIMEZONE) -> WindowCalendar:
+    """
+    Return the shared calendar for `timezone`, creating it on first use.
+
+    :raises ValueError: If the timezone name is unknown.
+    """
+    calendar = _calendars.get(timezone)
+    if calendar is None:
+        try:
+            calendar = WindowCalendar(timezone)
+        except pytz.UnknownTimeZoneError:
+            raise ValueError(f"Unknown timezone '{timezone}'.")
+        _calendars[timezone] = calendar
+    return calendar
@@ -0,0 +1,220 @@
+"""
+Benchmarks for the validation hot path.
+
+Measures ops/sec and p50/p99 latency of validator lookup, construction, the allowed and
+denied paths of each validator class and N-rule evaluation, at several asyncio
+concurrency levels, and checks that concurrent requests never overshoot a limit.
+
+Run from the repository root, so `alfred` is importable without installing it (or
+after `pip install -e .`), against a local redis-server:
+
+    python -m benchmarks.bench_validation --redis-url redis://localhost:6379/15
+
+against an in-memory fakeredis server running the same Lua scripts (requires
+`fakeredis[lua]`):
+
+    python -m benchmarks.bench_validation --fake
+
+or with no Redis at all, on the in-process counter store:
+
+    python -m benchmarks.bench_validation --memory
+
+Results are written as JSON to stdout or to `--output`, so runs can be compared across
+releases. The Redis database is flushed before each scenario; never point this at a
+database holding real counters.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+from alfred.memory_counter_store import InMemoryCounterStore
+from alfred.redis_manager import RedisManager
+from alfred.validator_factory import ValidatorFactory
+
+ENDPOINT = "/v1/chat/completions"
+MODEL = "standard-model"
+
+
+def make_rule(rule_id, rule_class_name, **conditions):
+    conditions.setdefault("condition_endpoints", [ENDPOINT])
+    return {"id": rule_id, "rule_class_name": rule_class_name, "conditions": conditions}
+
+
+RULES = {
+    "FreePlanModelValidation": lambda rule_id, limit: make_rule(
+        rule_id, "FreePlanModelValidation", request_limit=limit, allowed_models=[MODEL], reset_period="daily"
+    ),
+    "PremiumPlanModelValidation": lambda rule_id, limit: make_rule(
+        rule_id, "PremiumPlanModelValidation", request_limit=limit, allowed_standard_models=[MODEL]
+    ),
+    "FreePlanRestrictedEndpoints": lambda rule_id, limit: make_rule(
+        rule_id,
+        "FreePlanRestrictedEndpoints",
+        request_limit=limit,
+        condition_endpoints=["/v1/restricted"] if limit else [ENDPOINT],
+    ),
+}
+
+
+def build_factory(args) -> ValidatorFactory:
+    if args.memory:
+        return ValidatorFactory(None, counter_store=InMemoryCounterStore())
+    if args.fake:
+        try:
+            import fakeredis
+        except ImportError:
+            sys.exit("--fake requires `pip install fakeredis[lua]`")
+        return ValidatorFactory("redis://fake", client=fakeredis.FakeAsyncRedis(decode_responses=True))
+    return ValidatorFactory(args.redis_url)
+
+
+async def reset_counters(factory: ValidatorFactory):
+    store = factory.redis_manager
+    if isinstance(store, RedisManager):
+        await store.client.flushdb()
+    else:
+        store.clear()
+    store.denial_cache.clear()
+
+
+def summarize(scenario: str, concurrency: int, latencies: list, elapsed: float) -> dict:
+    latencies = sorted(latencies)
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "ops": len(latencies),
+        "ops_per_sec": round(len(latencies) / elapsed, 1),
+        "p50_us": round(quantiles[49] * 1e6, 1),
+        "p99_us": round(quantiles[98] * 1e6, 1),
+    }
+
+
+async def run_scenario(name: str, operation, iterations: int, concurrency: int) -> dict:
+    """Run `operation(i)` `iterations` times spread over `concurrency` coroutines."""
+    latencies = []
+    counter = iter(range(iterations))
+
+    async def worker():
+        for i in counter:
+            start = time.perf_counter()
+            result = operation(i)
+            if asyncio.iscoroutine(result):
+                await result
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(name, concurrency, latencies, time.perf_counter() - start)
+
+
+async def check_overshoot(factory: ValidatorFactory, limit: int, concurrency: int) -> dict:
+    """Fire far more concurrent requests than `limit` at one counter and count how many pass."""
+    validator = factory.load_validator(RULES["FreePlanModelValidation"](f"overshoot-{concurrency}", limit))
+    context = {"user_id": "overshoot-user", "endpoint": ENDPOINT, "model_used": MODEL}
+    requests = max(concurrency, limit * 3)
+    results = await asyncio.gather(*(validator.validate(context) for _ in range(requests)))
+    allowed = sum(1 for result in results if result[0])
+    return {"requests": requests, "limit": limit, "allowed": allowed, "overshoot": max(0, allowed - limit)}
+
+
+async def run(args) -> dict:
+    factory = build_factory(args)
+    results = []
+    correctness = []
+    try:
+        if isinstance(factory.redis_manager, RedisManager):
+            await factory.redis_manager.load_scripts()
+        big_limit = args.iterations * 10
+        for concurrency in args.concurrency:
+            await reset_counters(factory)
+
+            results.append(await run_scenario(
+                "factory_lookup",
+                lambda i: factory.registry.get("PremiumPlanModelValidation"),
+                args.iterations,
+                concurrency,
+            ))
+            results.append(await run_scenario(
+                "validator_construction",
+                lambda i: factory.load_validator(RULES["FreePlanModelValidation"](f"construct-{concurrency}-{i}", 10)),
+                args.iterations,
+                concurrency,
+            ))
+            results.append(await run_scenario(
+                "validator_cached_load",
+                lambda i: factory.load_validator(RULES["FreePlanModelValidation"]("cached", 10)),
+                args.iterations,
+                concurrency,
+            ))
+
+            for class_name, make in RULES.items():
+                for path, limit in (("allowed", big_limit), ("denied", 0)):
+                    validator = factory.load_validator(make(f"{class_name}-{path}-{concurrency}", limit))
+                    results.append(await run_scenario(
+                        f"{class_name}.{path}",
+                        lambda i: validator.validate(
+                            {"user_id": f"user-{i % args.tenants}", "endpoint": ENDPOINT, "model_used": MODEL}
+                        ),
+                        args.iterations,
+                        concurrency,
+                    ))
+
+            rules = [RULES["FreePlanModelValidation"](f"n-rule-{concurrency}-{n}", big_limit) for n in range(args.rules)]
+            results.append(await run_scenario(
+                f"validate_all.{args.rules}_rules",
+                lambda i: factory.validate_all(rules, user_id=f"user-{i % args.tenants}", endpoint=ENDPOINT, model_used=MODEL),
+                args.iterations,
+                concurrency,
+            ))
+
+            correctness.append(await check_overshoot(factory, args.overshoot_limit, concurrency))
+    finally:
+        await factory.aclose()
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "backend": "memory" if args.memory else "fakeredis" if args.fake else "redis",
+            "iterations": args.iterations,
+            "tenants": args.tenants,
+        },
+        "results": results,
+        "correctness": correctness,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1], formatter_class=argparse.RawDescriptionHelpFormatter)
+    backend = parser.add_mutually_exclusive_group(required=True)
+    backend.add_argument("--redis-url", help="URL of a disposable Redis database, e.g. redis://localhost:6379/15")
+    backend.add_argument("--fake", action="store_true", help="use an in-memory fakeredis server")
+    backend.add_argument("--memory", action="store_true", help="use the in-process counter store, without Redis")
+    parser.add_argument("--concurrency", type=lambda value: [int(level) for level in value.split(",")], default=[1, 16, 128],
+                        help="comma-separated asyncio concurrency levels (default: 1,16,128)")
+    parser.add_argument("--iterations", type=int, default=2000, help="operations per scenario (default: 2000)")
+    parser.add_argument("--rules", type=int, default=5, help="rules per validate_all call (default: 5)")
+    parser.add_argument("--tenants", type=int, default=100, help="distinct users spread over (default: 100)")
+    parser.add_argument("--overshoot-limit", type=int, default=50, help="limit used by the overshoot check (default: 50)")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = json.dumps(asyncio.run(run(args)), indent=2)
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()